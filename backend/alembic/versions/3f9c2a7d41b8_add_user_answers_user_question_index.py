@@ -0,0 +1,27 @@
+"""Add composite index on user_answers(user_id, question_id)
+
+Revision ID: 3f9c2a7d41b8
+Revises: 68783c473c15
+Create Date: 2026-10-18 14:05:22.907113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9c2a7d41b8'
+down_revision: Union[str, None] = '68783c473c15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_user_answers_user_id_question_id', 'user_answers', ['user_id', 'question_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_user_answers_user_id_question_id', table_name='user_answers')
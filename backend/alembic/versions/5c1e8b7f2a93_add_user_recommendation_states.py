@@ -0,0 +1,33 @@
+"""Add user_recommendation_states table
+
+Revision ID: 5c1e8b7f2a93
+Revises: d2a86f3c9e17
+Create Date: 2026-10-18 19:22:40.615388
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e8b7f2a93'
+down_revision: Union[str, None] = 'd2a86f3c9e17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('user_recommendation_states',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('profile_hash', sa.String(length=64), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_recommendation_states')
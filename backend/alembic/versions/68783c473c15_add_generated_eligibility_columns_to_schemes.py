@@ -0,0 +1,77 @@
+"""Add generated eligibility columns to schemes
+
+Revision ID: 68783c473c15
+Revises: 680bc172ec99
+Create Date: 2026-10-18 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '68783c473c15'
+down_revision: Union[str, None] = '680bc172ec99'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Keep these expressions identical to the Computed() columns on models.Scheme
+GENERATED_COLUMNS = [
+    ('min_age', sa.Numeric(), "(eligibility_criteria->>'min_age')::numeric"),
+    ('max_age', sa.Numeric(), "(eligibility_criteria->>'max_age')::numeric"),
+    ('max_income', sa.Numeric(), "(eligibility_criteria->>'max_income')::numeric"),
+    ('state_norm', sa.Text(), "lower(btrim(NULLIF(eligibility_criteria->>'state', '')))"),
+    ('marital_status_norm', sa.Text(), "lower(NULLIF(eligibility_criteria->>'marital_status', ''))"),
+    ('disability_required', sa.Boolean(), "(eligibility_criteria->>'disability_required')::boolean"),
+    ('categories_norm', postgresql.JSONB(astext_type=sa.Text()),
+     "CASE WHEN jsonb_typeof(eligibility_criteria->'category') = 'array' "
+     "AND jsonb_array_length(eligibility_criteria->'category') > 0 "
+     "THEN lower((eligibility_criteria->'category')::text)::jsonb END"),
+]
+
+BTREE_INDEXED = ['min_age', 'max_age', 'max_income', 'state_norm', 'marital_status_norm']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Generated columns need JSONB operators, so convert the criteria column first
+    op.alter_column(
+        'schemes', 'eligibility_criteria',
+        type_=postgresql.JSONB(astext_type=sa.Text()),
+        existing_type=postgresql.JSON(astext_type=sa.Text()),
+        existing_nullable=False,
+        postgresql_using='eligibility_criteria::jsonb'
+    )
+
+    for name, type_, expression in GENERATED_COLUMNS:
+        op.add_column('schemes', sa.Column(name, type_, sa.Computed(expression, persisted=True), nullable=True))
+
+    for name in BTREE_INDEXED:
+        op.create_index(f'ix_schemes_{name}', 'schemes', [name], unique=False)
+
+    op.create_index(
+        'ix_schemes_categories_norm', 'schemes', ['categories_norm'], unique=False,
+        postgresql_using='gin', postgresql_ops={'categories_norm': 'jsonb_path_ops'}
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_schemes_categories_norm', table_name='schemes')
+    for name in reversed(BTREE_INDEXED):
+        op.drop_index(f'ix_schemes_{name}', table_name='schemes')
+
+    for name, _, _ in reversed(GENERATED_COLUMNS):
+        op.drop_column('schemes', name)
+
+    op.alter_column(
+        'schemes', 'eligibility_criteria',
+        type_=postgresql.JSON(astext_type=sa.Text()),
+        existing_type=postgresql.JSONB(astext_type=sa.Text()),
+        existing_nullable=False,
+        postgresql_using='eligibility_criteria::json'
+    )
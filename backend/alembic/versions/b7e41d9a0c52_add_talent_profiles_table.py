@@ -0,0 +1,44 @@
+"""Add talent_profiles table
+
+Revision ID: b7e41d9a0c52
+Revises: 3f9c2a7d41b8
+Create Date: 2026-10-18 15:31:07.448120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e41d9a0c52'
+down_revision: Union[str, None] = '3f9c2a7d41b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('talent_profiles',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('category', sa.String(), nullable=False),
+    sa.Column('total', sa.Float(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'category')
+    )
+    # Fold in existing answers; same aggregate as services.talent_recommendation_service.rebuild_profiles.
+    # Re-sync later with: python -m scripts.backfill_talent_profiles
+    op.execute("""
+        INSERT INTO talent_profiles (user_id, category, total, count)
+        SELECT user_answers.user_id, questions.category, SUM(user_answers.answer_value), COUNT(user_answers.id)
+        FROM user_answers
+        JOIN questions ON questions.id = user_answers.question_id
+        GROUP BY user_answers.user_id, questions.category
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('talent_profiles')
@@ -0,0 +1,42 @@
+"""Make user_career_recommendations one row per user and career
+
+Revision ID: d2a86f3c9e17
+Revises: b7e41d9a0c52
+Create Date: 2026-10-18 16:48:55.120394
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2a86f3c9e17'
+down_revision: Union[str, None] = 'b7e41d9a0c52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Every GET used to append rows; keep only the newest one per user and career
+    op.execute("""
+        DELETE FROM user_career_recommendations older
+        USING user_career_recommendations newer
+        WHERE older.user_id = newer.user_id
+          AND older.career_id = newer.career_id
+          AND older.id < newer.id
+    """)
+    op.add_column('user_career_recommendations', sa.Column('profile_hash', sa.String(length=64), nullable=True))
+    op.create_unique_constraint(
+        'uq_user_career_recommendations_user_career',
+        'user_career_recommendations',
+        ['user_id', 'career_id']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_user_career_recommendations_user_career', 'user_career_recommendations', type_='unique')
+    op.drop_column('user_career_recommendations', 'profile_hash')
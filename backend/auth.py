@@ -1,33 +1,45 @@
 from datetime import datetime, timedelta
+from collections import OrderedDict
 from typing import Optional
+import os
+import time
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from models import User
 from schemas import TokenData
 from fastapi import Depends, HTTPException, status
 from database import get_db
+from services.password_hasher import password_hasher
+from services.table_cache import WriteTracker
 
 # 🔐 Security Config
 SECRET_KEY = "your_secret_key"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-# ✅ Hash & Verify Passwords
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+# Authenticated principals kept per worker; other workers see a user or role change after the TTL
+AUTH_PRINCIPAL_CACHE_SIZE = int(os.getenv("AUTH_PRINCIPAL_CACHE_SIZE", 10000))
+AUTH_PRINCIPAL_CACHE_TTL = float(os.getenv("AUTH_PRINCIPAL_CACHE_TTL", 300))
+# Decoded tokens kept per worker, each until it expires
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", 10000))
 
 # ✅ Authenticate User
 async def authenticate_user(db: AsyncSession, email: str, password: str) -> Optional[User]:
     result = await db.execute(select(User).filter(User.email == email))
     user = result.scalars().first()
-    
-    if not user or not verify_password(password, user.password):
+    if not user:
         return None  # Return None instead of False to be explicit
-    
+
+    valid, new_hash = await password_hasher.verify_and_update(password, user.password)
+    if not valid:
+        return None
+
+    # The stored hash used an outdated work factor; replace it while we know the password
+    if new_hash:
+        user.password = new_hash
+        await db.commit()
+
     return user  # Return the full User object
 
 # ✅ Generate JWT Access Token
@@ -36,3 +48,97 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+
+
+# ✅ Authenticated principal: the part of a user that request handlers need
+class Principal:
+    __slots__ = ("id", "name", "role")
+
+    def __init__(self, id: int, name: str, role: str):
+        self.id = id
+        self.name = name
+        self.role = role
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(id=user.id, name=user.name, role=user.role)
+
+
+class BoundedTTLCache:
+    """LRU map whose entries also expire; lookups and stores are O(1)."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[object, tuple]" = OrderedDict()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key, value, expires_at: float):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def discard(self, key):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+
+principal_cache = BoundedTTLCache(AUTH_PRINCIPAL_CACHE_SIZE)
+token_cache = BoundedTTLCache(AUTH_TOKEN_CACHE_SIZE)
+
+
+def remember_principal(user: User) -> Principal:
+    principal = Principal.from_user(user)
+    principal_cache.put(principal.id, principal, time.time() + AUTH_PRINCIPAL_CACHE_TTL)
+    return principal
+
+
+# ✅ Decode a JWT, verifying the signature only the first time a token is seen
+def decode_access_token(token: str) -> dict:
+    payload = token_cache.get(token)
+    if payload is None:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        # Tokens without an expiry are verified every time
+        if isinstance(payload.get("exp"), (int, float)):
+            token_cache.put(token, payload, payload["exp"])
+    return payload
+
+
+# ✅ Resolve the principal behind a verified token, from the cache when possible
+async def get_principal(db: AsyncSession, payload: dict) -> Optional[Principal]:
+    user_id = payload.get("id")
+    if user_id is not None:
+        principal = principal_cache.get(user_id)
+        if principal is not None:
+            return principal
+        result = await db.execute(select(User).filter(User.id == user_id))
+    else:
+        # Tokens issued before they carried the user id
+        result = await db.execute(select(User).filter(User.email == payload.get("sub")))
+    user = result.scalars().first()
+    return remember_principal(user) if user else None
+
+
+def _forget_principals(user_ids: Optional[set]):
+    # None: a bulk write touched users we can't name, so forget everyone
+    if user_ids is None:
+        principal_cache.clear()
+        return
+    for user_id in user_ids:
+        principal_cache.discard(user_id)
+
+
+# Inserted users have no cached principal yet
+principal_writes = WriteTracker("principals", [User], _forget_principals, operations=("update", "delete"))
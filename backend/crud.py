@@ -1,21 +1,19 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from passlib.context import CryptContext
+from services.password_hasher import password_hasher
 from sqlalchemy import insert, func
 import models, schemas
 from typing import Dict, List
 from collections import defaultdict
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+async def hash_password(password: str) -> str:
+    return await password_hasher.hash(password)
 
 async def create_user(db: AsyncSession, user: schemas.UserCreate):
     db_user = models.User(
         name=user.name,
         email=user.email,
-        password=hash_password(user.password),
+        password=await hash_password(user.password),
         role=user.role or "user"
     )
     db.add(db_user)
@@ -1,20 +1,57 @@
 # backend/database.py
 
+import asyncio
 import os
 from dotenv import load_dotenv
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
-from fastapi import FastAPI, Depends
+from sqlalchemy import text
 
 # Load environment variables
 load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Optional replica for read-only endpoints; defaults to the primary
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL") or DATABASE_URL
+
+# Engine profile
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+# Server-side limit per statement in milliseconds (0 = no limit)
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 30000))
+# Prepared statements asyncpg keeps per connection
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", 100))
+# Logs every statement; for local debugging only
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() == "true"
+
+
+def engine_options(url: str) -> dict:
+    options = {
+        "echo": DB_ECHO,
+        "future": True,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+    if url and url.startswith("postgresql+asyncpg"):
+        connect_args = {"prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE}
+        if DB_STATEMENT_TIMEOUT_MS:
+            connect_args["server_settings"] = {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}
+        options["connect_args"] = connect_args
+    return options
+
 
 # Create an async engine
-engine = create_async_engine(DATABASE_URL, echo=True, future=True)
+engine = create_async_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+read_engine = engine if DATABASE_READ_URL == DATABASE_URL else create_async_engine(DATABASE_READ_URL, **engine_options(DATABASE_READ_URL))
 
 # Create session factory
 AsyncSessionLocal = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+AsyncReadSessionLocal = sessionmaker(bind=read_engine, class_=AsyncSession, expire_on_commit=False)
 
 # Base model for Alembic migrations
 Base = declarative_base()
@@ -29,13 +66,45 @@ async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
 
-# FastAPI app and test route for DB connection
-app = FastAPI()
+# Dependency for read-only endpoints; served by the replica when DATABASE_READ_URL is set
+async def get_read_db():
+    async with AsyncReadSessionLocal() as session:
+        yield session
+
+
+def pool_metrics() -> dict:
+    """Connection pool usage per engine; saturation is checked-out connections over the pool's hard limit."""
+    engines = {"primary": engine}
+    if read_engine is not engine:
+        engines["replica"] = read_engine
+
+    metrics = {}
+    for name, current in engines.items():
+        pool = current.pool
+        capacity = DB_POOL_SIZE + DB_MAX_OVERFLOW
+        checked_out = pool.checkedout()
+        metrics[name] = {
+            "pool_size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": checked_out,
+            "overflow": pool.overflow(),
+            "capacity": capacity,
+            "saturation": round(checked_out / capacity, 4) if capacity else 0.0
+        }
+    return metrics
+
+
+async def warm_pools():
+    """Opens the steady-state connections of every pool up front so the first requests do not pay for them."""
+    async def ping(current):
+        async with current.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    engines = [engine] if read_engine is engine else [engine, read_engine]
+    await asyncio.gather(*(ping(current) for current in engines for _ in range(DB_POOL_SIZE)))
+
 
-@app.get("/test-db")
-async def test_db(db: AsyncSession = Depends(get_async_db)):
-    try:
-        await db.execute("SELECT 1")  # Basic query to check DB connection
-        return {"message": "Database connection successful!"}
-    except Exception as e:
-        return {"error": str(e)}
+async def dispose_engines():
+    await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
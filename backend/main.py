@@ -1,24 +1,40 @@
 # backend/main.py
 
-from fastapi import FastAPI, Depends, HTTPException, Security
+import time
+_import_started = time.perf_counter()
+
+from fastapi import FastAPI, Depends, HTTPException, Request, Security
+from fastapi.responses import JSONResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from database import get_db, engine
+from database import get_db, engine, dispose_engines, pool_metrics, warm_pools, AsyncReadSessionLocal
 from contextlib import asynccontextmanager
 from sqlalchemy import text
 from fastapi.middleware.cors import CORSMiddleware
-from jose import JWTError, jwt
+from jose import JWTError
 from typing import List, Dict, Union
 from dotenv import load_dotenv
 import os
 from routers import talent  # Talent Recognition Import
 from routers import chatbot
 from routers import scheme_recommendation
+from routers import transcription
+from services.http_clients import init_http_clients, close_http_clients
+from services.transcription import transcription_service
+from services.tts_pool import tts_pool
+from services.password_hasher import password_hasher, PasswordHasherBusy, PASSWORD_HASH_RETRY_AFTER
+from services.startup import startup_state
+from services.scheme_index import scheme_index
+from services.question_cache import question_cache
+from services.career_matcher import career_matcher
 
 # Local modules
 import crud, models, schemas
-from auth import authenticate_user, create_access_token, SECRET_KEY, ALGORITHM
+from auth import (
+    authenticate_user, create_access_token, decode_access_token, get_principal,
+    remember_principal, Principal
+)
 
 # Load environment variables
 load_dotenv()
@@ -35,17 +51,65 @@ if not os.getenv("OPENROUTER_API_KEY"):
 if not os.getenv("ASSEMBLY_API_KEY"):
     raise RuntimeError("Missing AssemblyAI API Key. Set ASSEMBLY_API_KEY in your .env file.")
 
-# Database setup during lifespan
-@asynccontextmanager
-async def lifespan(app: FastAPI):
+# Tables come from Alembic migrations ("alembic upgrade head"); create_all is a shortcut for local development only
+DB_CREATE_ALL = os.getenv("DB_CREATE_ALL", "false").lower() == "true"
+# Spawn the local STT and fallback TTS worker processes during warm-up instead of on first use
+WARM_SPEECH_WORKERS = os.getenv("WARM_SPEECH_WORKERS", "false").lower() == "true"
+
+
+async def create_tables():
     async with engine.begin() as conn:
         await conn.run_sync(models.Base.metadata.create_all)
+
+
+async def with_read_session(load):
+    async with AsyncReadSessionLocal() as db:
+        await load(db)
+
+
+def warm_up_steps() -> dict:
+    steps = {
+        "database_pools": warm_pools,
+        "scheme_index": lambda: with_read_session(scheme_index.get),
+        "question_cache": lambda: with_read_session(question_cache.get),
+        "career_matcher": lambda: with_read_session(career_matcher.get),
+    }
+    if WARM_SPEECH_WORKERS:
+        steps["stt_workers"] = transcription_service.warm_up
+        steps["tts_workers"] = tts_pool.start
+    return steps
+
+
+# Startup is kept short: the app starts accepting connections straight away and
+# warms pools and caches in the background; /ready answers 503 until that is done.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    startup_state.record("imports", _import_seconds)
+    if DB_CREATE_ALL:
+        await startup_state.step("create_all", create_tables())
+    # Shared keep-alive pools for the chatbot upstreams
+    await startup_state.step("http_clients", init_http_clients())
+    startup_state.start_warm_up(warm_up_steps())
     yield
-    await engine.dispose()
+    await startup_state.close()
+    await tts_pool.close()
+    await password_hasher.close()
+    await transcription_service.close()
+    await close_http_clients()
+    await dispose_engines()
 
 # Initialize FastAPI app
 app = FastAPI(lifespan=lifespan)
 
+# Password hashing is saturated: ask the client to back off instead of queueing without bound
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy(request: Request, exc: PasswordHasherBusy):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "Too many sign-in attempts right now. Please retry shortly."},
+        headers={"Retry-After": str(PASSWORD_HASH_RETRY_AFTER)}
+    )
+
 # Enable CORS for frontend
 app.add_middleware(
     CORSMiddleware,
@@ -59,17 +123,17 @@ app.add_middleware(
 # Auth setup
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
-# Get current user from JWT
+# Get current user from JWT; a signed token for a cached principal needs no database round trip
 async def get_current_user(token: str = Security(oauth2_scheme), db: AsyncSession = Depends(get_db)):
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_access_token(token)
         email: str = payload.get("sub")
         role: str = payload.get("role")
 
         if not email or not role:
             raise HTTPException(status_code=401, detail="Invalid authentication token")
 
-        user = await crud.get_user_by_email(db, email)
+        user = await get_principal(db, payload)
         if not user:
             raise HTTPException(status_code=401, detail="User not found")
 
@@ -78,7 +142,7 @@ async def get_current_user(token: str = Security(oauth2_scheme), db: AsyncSessio
         raise HTTPException(status_code=401, detail="Could not validate credentials")
 
 # Admin-only access dependency
-async def get_admin_user(user: models.User = Depends(get_current_user)):
+async def get_admin_user(user: Principal = Depends(get_current_user)):
     if user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
     return user
@@ -121,9 +185,21 @@ async def login_for_access_token(
     if not user:
         raise HTTPException(status_code=400, detail="Invalid credentials")
 
+    # Warm the principal cache so the requests that follow skip the user lookup
+    remember_principal(user)
     access_token = create_access_token({"sub": user.email, "role": user.role, "id": user.id})
     return {"access_token": access_token, "token_type": "bearer"}
 
+# Readiness: 503 until pools and caches are warm, with the startup timing breakdown
+@app.get("/ready")
+async def readiness():
+    return JSONResponse(status_code=200 if startup_state.ready else 503, content=startup_state.snapshot())
+
+# Connection pool saturation per database engine
+@app.get("/health/db-pool")
+async def db_pool_health():
+    return pool_metrics()
+
 # Admin dashboard
 @app.get("/admin", dependencies=[Depends(get_admin_user)])
 async def admin_dashboard():
@@ -131,12 +207,16 @@ async def admin_dashboard():
 
 # Auth status check
 @app.get("/auth/verify")
-async def verify_authentication(user: models.User = Depends(get_current_user)):
+async def verify_authentication(user: Principal = Depends(get_current_user)):
     return {"status": "Authenticated", "user": {"name": user.name, "role": user.role}}
 
 # Include Chatbot Router
 app.include_router(chatbot.router, prefix="/api", tags=["Chatbot"])
 
+app.include_router(transcription.router, prefix="/api", tags=["Transcription"])
+
 app.include_router(talent.router, prefix="/api", tags=["Talent Recognition"])
 
-app.include_router(scheme_recommendation.router)
\ No newline at end of file
+app.include_router(scheme_recommendation.router)
+
+_import_seconds = time.perf_counter() - _import_started
@@ -2,7 +2,8 @@
 
 from datetime import datetime
 from sqlalchemy import (
-    Column, Integer, String, ForeignKey, Float, JSON, Table, Text
+    Column, Integer, String, ForeignKey, Float, JSON, Table, Text,
+    Boolean, Numeric, Computed, Index, UniqueConstraint
 )
 from sqlalchemy.orm import relationship, declarative_base
 from sqlalchemy.dialects.postgresql import JSONB
@@ -53,6 +54,20 @@ class UserAnswer(Base):
     user = relationship("User", back_populates="responses")
     question = relationship("Question")
 
+    # Profiles are aggregated per user over their answers' questions
+    __table_args__ = (
+        Index("ix_user_answers_user_id_question_id", "user_id", "question_id"),
+    )
+
+# Running per-category sum and count of each user's answers, kept up to date by
+# /talent/submit so recommendations read a ready profile (average = total / count)
+class UserTalentProfile(Base):
+    __tablename__ = "talent_profiles"
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    category = Column(String, primary_key=True)
+    total = Column(Float, nullable=False, default=0)
+    count = Column(Integer, nullable=False, default=0)
+
 # -----------------------
 # Talent Categories & Associations
 # -----------------------
@@ -106,6 +121,19 @@ class UserCareerRecommendation(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     career_id = Column(Integer, ForeignKey("career_paths.id"), nullable=False)
     score = Column(Float, nullable=False)  # Match score based on user's talents
+    # Hash of the profile and career set the score was computed from; unchanged means the row is fresh
+    profile_hash = Column(String(64), nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "career_id", name="uq_user_career_recommendations_user_career"),
+    )
+
+# Profile hash each user's recommendations were last computed at, kept even when
+# no career matched, so an unchanged profile is served without rescoring
+class UserRecommendationState(Base):
+    __tablename__ = "user_recommendation_states"
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    profile_hash = Column(String(64), nullable=False)
 
 #---------------------------------------------------
 #schemes
@@ -118,7 +146,26 @@ class Scheme(Base):
     name = Column(Text, nullable=False)
     description = Column(Text)
     type = Column(String, nullable=False)
-    eligibility_criteria = Column(JSON, nullable=False)
+    eligibility_criteria = Column(JSONB, nullable=False)
     benefits = Column(Text)
     links = Column(String, nullable=True)  # ✅ New field for external URL
 
+    # Generated from eligibility_criteria so PostgreSQL can filter and index the rules
+    min_age = Column(Numeric, Computed("(eligibility_criteria->>'min_age')::numeric", persisted=True), index=True)
+    max_age = Column(Numeric, Computed("(eligibility_criteria->>'max_age')::numeric", persisted=True), index=True)
+    max_income = Column(Numeric, Computed("(eligibility_criteria->>'max_income')::numeric", persisted=True), index=True)
+    state_norm = Column(Text, Computed("lower(btrim(NULLIF(eligibility_criteria->>'state', '')))", persisted=True), index=True)
+    marital_status_norm = Column(Text, Computed("lower(NULLIF(eligibility_criteria->>'marital_status', ''))", persisted=True), index=True)
+    disability_required = Column(Boolean, Computed("(eligibility_criteria->>'disability_required')::boolean", persisted=True))
+    categories_norm = Column(JSONB, Computed(
+        "CASE WHEN jsonb_typeof(eligibility_criteria->'category') = 'array' "
+        "AND jsonb_array_length(eligibility_criteria->'category') > 0 "
+        "THEN lower((eligibility_criteria->'category')::text)::jsonb END",
+        persisted=True
+    ))
+
+    __table_args__ = (
+        Index("ix_schemes_categories_norm", "categories_norm",
+              postgresql_using="gin", postgresql_ops={"categories_norm": "jsonb_path_ops"}),
+    )
+
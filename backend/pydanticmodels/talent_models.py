@@ -1,6 +1,6 @@
 # backend/pydanticmodels/talent_models.py
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Dict, Optional
 
 # ----------------------
@@ -17,6 +17,11 @@ class QuestionnaireSubmission(BaseModel):
     answers: List[Answer]
 
 
+class BatchRecommendationRequest(BaseModel):
+    user_ids: List[int]
+    top_k: int = Field(5, ge=1, le=50)
+
+
 class QuestionCreate(BaseModel):
     question_text: str
     category: Optional[str] = None
@@ -72,3 +77,8 @@ class CareerRecommendation(BaseModel):
 
     class Config:
         from_attributes = True  
+
+
+class BatchRecommendationResponse(BaseModel):
+    recommendations: Dict[int, List[CareerRecommendation]]
+    missing_user_ids: List[int]
@@ -1,16 +1,32 @@
 # backend/routers/chatbot.py
 
-from fastapi import APIRouter, File, Form, UploadFile
+from fastapi import APIRouter, File, Form, HTTPException, Request, UploadFile
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from pydantic import BaseModel
-import os, requests, base64, tempfile, pyttsx3, time, pathlib
+from typing import AsyncIterator, Optional
+from collections import deque
+import asyncio, os, json
+from services.http_clients import get_client
+from services.answer_cache import create_answer_cache
+from services.audio_cache import audio_cache, audio_key, is_audio_key
+from services.transcription import transcription_service, iter_upload, UploadTooLarge
+from services.tts_pool import tts_pool
+from services.llm_router import LLMStreamBroken, llm_router
+from services.singleflight import SingleFlight
+from services.speech_segments import SpeechSegmenter
 
 router = APIRouter()
 
 # Environment variables
-ASSEMBLY_API_KEY = os.getenv("ASSEMBLY_API_KEY")
 ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
 ELEVENLABS_VOICE_ID = os.getenv("ELEVENLABS_VOICE_ID")
-OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
+AI_UNAVAILABLE_MESSAGE = "Sorry, the AI service is currently unavailable."
+
+VOICE_SETTINGS = {
+    "stability": 0.5,
+    "similarity_boost": 0.75
+}
+FALLBACK_VOICE_ID = "pyttsx3"
 
 class ChatRequest(BaseModel):
     text: str
@@ -30,112 +46,132 @@ Make sure the answer is correct and easy to understand."""
 
 
 
-def call_openrouter(prompt: str) -> str:
+async def call_llm(prompt: str) -> str:
+    # Routed across the configured providers with circuit breakers and hedging
     try:
-        formatted_prompt = format_prompt(prompt)
-        print("📡 Sending request to OpenRouter...")
-
-        response = requests.post(
-            "https://openrouter.ai/api/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": "mistralai/mistral-7b-instruct",  # ✅ free model
-                "messages": [{"role": "user", "content": formatted_prompt}],
-                "max_tokens": 512,
-                "temperature": 0.7
-            }
-        )
-        response.raise_for_status()
-        data = response.json()
-        if "choices" not in data:
-            print("⚠️ OpenRouter response missing 'choices':", data)
-            raise Exception("No choices returned")
-
-        print("✅ OpenRouter response received")
-        return data["choices"][0]["message"]["content"]
-
+        return await llm_router.complete(format_prompt(prompt))
     except Exception as e:
-        print(f"OpenRouter failed: {e}")
-        print("🔁 Switching to local TinyLlama fallback...")
-        return call_tinyllama(prompt)
+        print(f"All LLM providers failed: {e}")
+        return AI_UNAVAILABLE_MESSAGE
 
 
-def call_tinyllama(prompt: str) -> str:
+async def stream_llm(prompt: str) -> AsyncIterator[str]:
+    # A stream that breaks after the first token raises LLMStreamBroken to the caller
+    started = False
     try:
-        formatted_prompt = format_prompt(prompt)
-        print("🤖 Querying local TinyLlama via Ollama...")
-
-        response = requests.post(
-            "http://localhost:11434/api/generate",
-            json={
-                "model": "tinyllama",
-                "prompt": formatted_prompt,
-                "stream": False,
-                "num_predict": 2048
-            }
-        )
-        response.raise_for_status()
-        print("✅ TinyLlama responded")
-        return response.json().get("response", "TinyLlama gave no response.")
+        async for token in llm_router.stream(format_prompt(prompt)):
+            started = True
+            yield token
     except Exception as e:
-        print(f"TinyLlama fallback failed: {e}")
-        return "Sorry, the AI service is currently unavailable."
+        if started:
+            raise
+        print(f"All LLM providers failed: {e}")
+        yield AI_UNAVAILABLE_MESSAGE
+
+
+async def stream_answer(prompt: str) -> AsyncIterator[str]:
+    """
+    Streams the answer with the same shape as the blocking path:
+    "Certainly. " followed by the model output with surrounding whitespace stripped.
+    Trailing whitespace is held back until more text follows it.
+    """
+    yield "Certainly. "
+    started = False
+    pending = ""
+    async for token in stream_llm(prompt):
+        if not started:
+            token = token.lstrip()
+            if not token:
+                continue
+            started = True
+        stripped = token.rstrip()
+        if stripped:
+            yield pending + stripped
+            pending = token[len(stripped):]
+        else:
+            pending += token
 
-def transcribe_audio(file: UploadFile) -> str:
-    try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as temp:
-            temp.write(file.file.read())
-            wav_path = temp.name
 
-        headers = {
-            "authorization": ASSEMBLY_API_KEY,
-            "content-type": "application/octet-stream"
-        }
+# Answers keyed on the normalised question as it is sent to the LLM
+answer_cache = create_answer_cache(format_prompt)
 
-        with open(wav_path, 'rb') as audio_file:
-            upload_response = requests.post(
-                "https://api.assemblyai.com/v2/upload",
-                headers=headers,
-                data=audio_file
-            )
-
-        upload_url = upload_response.json().get("upload_url")
-        if not upload_url:
-            raise Exception("Upload URL not received")
-
-        transcript_response = requests.post(
-            "https://api.assemblyai.com/v2/transcript",
-            headers={"authorization": ASSEMBLY_API_KEY},
-            json={"audio_url": upload_url}
-        )
-        transcript_response.raise_for_status()
-        transcript_id = transcript_response.json()["id"]
-
-        polling_url = f"https://api.assemblyai.com/v2/transcript/{transcript_id}"
-        while True:
-            polling_res = requests.get(polling_url, headers={"authorization": ASSEMBLY_API_KEY})
-            polling_data = polling_res.json()
-            if polling_data["status"] == "completed":
-                return polling_data.get("text", "")
-            elif polling_data["status"] == "error":
-                raise Exception(f"Transcription error: {polling_data.get('error')}")
-            time.sleep(1)
+# Audio is content-addressed by the answer text, so a cached answer
+# finds its already-synthesised clip through the audio cache.
+async def remember_answer(user_text: str, ai_text: str):
+    # Never cache the canned failure answer
+    if ai_text.endswith(AI_UNAVAILABLE_MESSAGE):
+        return
+    await answer_cache.set(user_text, {"ai_text": ai_text})
+
+# Identical questions asked at the same time share one LLM call, and
+# requests for the same clip share one synthesis
+answer_flights = SingleFlight("answers")
+answer_streams = SingleFlight("answer streams")
+audio_flights = SingleFlight("audio")
+audio_streams = SingleFlight("audio streams")
+
+async def answer_question(user_text: str) -> str:
+    ai_text = await call_llm(user_text)
+    ai_text = "Certainly. " + ai_text.strip()
+    await remember_answer(user_text, ai_text)
+    return ai_text
+
+async def stream_and_remember(user_text: str) -> AsyncIterator[str]:
+    parts = []
+    try:
+        async for token in stream_answer(user_text):
+            parts.append(token)
+            yield token
+    except LLMStreamBroken:
+        # Listeners keep the text they already have, but a truncated answer is never cached
+        return
+    await remember_answer(user_text, "".join(parts))
+
+def shared_answer_stream(user_text: str) -> AsyncIterator[str]:
+    # The streaming counterpart of answer_flights: one LLM stream per question,
+    # replayed to every request that asks it meanwhile, and cached once complete
+    return answer_streams.share(answer_cache.key_for(user_text), lambda: stream_and_remember(user_text)).listen()
+
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def transcribe_audio(file: Optional[UploadFile], transcription_id: Optional[str] = None) -> str:
+    # Either subscribe to a job submitted earlier via /api/transcriptions, or submit one now.
+    # Waiting is an asyncio await, so the worker keeps serving other requests meanwhile.
+    # Jobs live in the memory of the worker that accepted the upload, so with several
+    # workers the load balancer must route a client's requests to the same worker.
+    if transcription_id is not None and transcription_service.get(transcription_id) is None:
+        raise HTTPException(status_code=404, detail="Transcription job not found")
+    if transcription_id is None and file is None:
+        return ""
+    try:
+        if transcription_id is None:
+            job = await transcription_service.submit(iter_upload(file))
+            transcription_id = job.id
+        return await transcription_service.wait(transcription_id)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         print(f"Transcription failed: {e}")
         return ""
 
-def generate_audio(text: str) -> tuple[str, str]:
-    audio_base64 = ""
+async def generate_audio(text: str) -> tuple[str, str]:
+    """
+    Synthesises `text` (or reuses an earlier clip with the same content address)
+    and returns (audio_id, mime). The clip is served from /api/chat/audio/{audio_id}.
+    """
+    audio_id = audio_key(text, ELEVENLABS_VOICE_ID, VOICE_SETTINGS)
+    cached = audio_cache.lookup(audio_id)
+    if cached:
+        return audio_id, cached[1]
+    return await audio_flights.do(audio_id, lambda: synthesize_audio(audio_id, text))
+
+async def synthesize_audio(audio_id: str, text: str) -> tuple[str, str]:
     try:
         tts_payload = {
             "text": text,
-            "voice_settings": {
-                "stability": 0.5,
-                "similarity_boost": 0.75
-            }
+            "voice_settings": VOICE_SETTINGS
         }
         tts_headers = {
             "xi-api-key": ELEVENLABS_API_KEY,
@@ -143,72 +179,304 @@ def generate_audio(text: str) -> tuple[str, str]:
             "Accept": "audio/mpeg"
         }
 
-        tts_res = requests.post(
-            f"https://api.elevenlabs.io/v1/text-to-speech/{ELEVENLABS_VOICE_ID}",
+        tts_res = await get_client("elevenlabs").post(
+            f"/text-to-speech/{ELEVENLABS_VOICE_ID}",
             headers=tts_headers,
             json=tts_payload
         )
 
         if tts_res.status_code == 200 and tts_res.content:
             print("🔊 ElevenLabs TTS success")
-            audio_base64 = base64.b64encode(tts_res.content).decode("utf-8")
-            return audio_base64, "audio/mpeg"
+            await audio_cache.store(audio_id, tts_res.content, "audio/mpeg")
+            return audio_id, "audio/mpeg"
         else:
             print("⚠️ ElevenLabs TTS failed:", tts_res.status_code, tts_res.text)
 
     except Exception as tts_err:
         print("⚠️ ElevenLabs Exception:", tts_err)
 
-    return fallback_tts(text)
-
-def fallback_tts(text: str) -> tuple[str, str]:
-    try:
-        print("🎙️ Using pyttsx3 TTS fallback...")
-        engine = pyttsx3.init()
-        voices = engine.getProperty('voices')
-        zira_voice = next((v for v in voices if "zira" in v.name.lower()), None)
-        if zira_voice:
-            engine.setProperty('voice', zira_voice.id)
-
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tf:
-            temp_path = pathlib.Path(tf.name)
-            temp_filename = str(temp_path)
+    return await generate_fallback_audio(text)
 
-        engine.save_to_file(text, temp_filename)
-        engine.runAndWait()
+async def generate_fallback_audio(text: str) -> tuple[str, str]:
+    # The fallback voice is a different rendering, so it gets its own content address
+    fallback_id = audio_key(text, FALLBACK_VOICE_ID)
+    cached = audio_cache.lookup(fallback_id)
+    if cached:
+        return fallback_id, cached[1]
+    return await audio_flights.do(fallback_id, lambda: synthesize_fallback_audio(fallback_id, text))
 
-        time.sleep(0.5)
-        if not temp_path.exists() or temp_path.stat().st_size == 0:
-            raise Exception("Fallback TTS file was empty")
-
-        with open(temp_filename, "rb") as f:
-            fallback_audio = f.read()
-            if not fallback_audio:
-                raise Exception("Read empty fallback audio file")
-            audio_base64 = base64.b64encode(fallback_audio).decode("utf-8")
+async def synthesize_fallback_audio(fallback_id: str, text: str) -> tuple[str, str]:
+    # Long-lived pyttsx3 worker processes; safe to call concurrently
+    fallback_audio, fallback_mime = await tts_pool.synthesize(text)
+    if not fallback_audio:
+        return "", ""
+    await audio_cache.store(fallback_id, fallback_audio, fallback_mime)
+    return fallback_id, fallback_mime
+
+async def prepare_audio(text: str) -> tuple[str, str]:
+    """
+    Returns a reference to the clip for `text` without synthesising it.
+    Unless it is already cached, the text is registered as pending and
+    GET /api/chat/audio/{audio_id} streams it from ElevenLabs on demand.
+    """
+    audio_id = audio_key(text, ELEVENLABS_VOICE_ID, VOICE_SETTINGS)
+    cached = audio_cache.lookup(audio_id)
+    if cached:
+        return audio_id, cached[1]
+    await audio_cache.register_pending(audio_id, text)
+    return audio_id, "audio/mpeg"
+
+async def stream_elevenlabs(text: str) -> AsyncIterator[bytes]:
+    async with get_client("elevenlabs").stream(
+        "POST",
+        f"/text-to-speech/{ELEVENLABS_VOICE_ID}/stream",
+        headers={
+            "xi-api-key": ELEVENLABS_API_KEY,
+            "Content-Type": "application/json",
+            "Accept": "audio/mpeg"
+        },
+        json={
+            "text": text,
+            "voice_settings": VOICE_SETTINGS
+        }
+    ) as response:
+        if response.status_code != 200:
+            body = await response.aread()
+            raise Exception(f"ElevenLabs stream failed: {response.status_code} {body[:200]!r}")
+        async for chunk in response.aiter_bytes():
+            if chunk:
+                yield chunk
+
+async def stream_to_cache(audio_id: str, text: str) -> AsyncIterator[bytes]:
+    # Writes the clip into the cache as it passes; committed only once it is complete
+    writer = None
+    try:
+        async for chunk in stream_elevenlabs(text):
+            if writer is None:
+                writer = await audio_cache.writer(audio_id, "audio/mpeg")
+            await writer.write(chunk)
+            yield chunk
+    except BaseException:
+        if writer is not None:
+            writer.abort()
+        raise
+    if writer is not None:
+        await writer.commit()
+        await audio_cache.clear_pending(audio_id)
+        print("🔊 ElevenLabs TTS streamed and cached")
+
+async def settle_on_fallback(audio_id: str, fallback_path: str):
+    # Concurrent fallback requests for the clip alias it once
+    await audio_flights.do(audio_id + ":fallback", lambda: alias_fallback(audio_id, fallback_path))
+
+async def alias_fallback(audio_id: str, fallback_path: str):
+    # Clients may already cache the fallback clip under audio_id (its ETag is immutable),
+    # so keep serving that clip under audio_id instead of leaving the text pending
+    try:
+        await audio_cache.alias(audio_id, fallback_path)
+    except OSError as e:
+        print("⚠️ Could not cache fallback audio:", e)
+        return
+    await audio_cache.clear_pending(audio_id)
+
+def audio_fields(audio_id: str, audio_mime: str) -> dict:
+    # A reference to the clip instead of inlining it as base64
+    return {
+        "audio_id": audio_id,
+        "audio_url": f"/api/chat/audio/{audio_id}" if audio_id else "",
+        "audio_mime": audio_mime
+    }
 
-        print("✅ Fallback TTS used. Audio length:", len(audio_base64))
-        temp_path.unlink()
+async def segment_audio(index: int, segment: str) -> dict:
+    try:
+        audio_id, audio_mime = await generate_audio(segment)
+    except Exception as e:
+        print(f"⚠️ Segment {index} synthesis failed: {e}")
+        audio_id, audio_mime = "", ""
+    return {"index": index, "text": segment, **audio_fields(audio_id, audio_mime)}
+
+async def pipelined_answer(user_text: str) -> AsyncIterator[tuple[str, dict]]:
+    """
+    Streams the answer and synthesises it sentence by sentence while the LLM is
+    still generating. Yields ("token", ...) events as text arrives, ("audio_segment", ...)
+    events in answer order as each clip becomes ready, and a ("done", ...) event
+    once the text is complete.
+    """
+    cached = await answer_cache.get(user_text)
+    segmenter = SpeechSegmenter()
+    synthesis = deque()
+    segment_count = 0
+
+    def start(segments):
+        nonlocal segment_count
+        for segment in segments:
+            synthesis.append(asyncio.create_task(segment_audio(segment_count, segment)))
+            segment_count += 1
 
-        return audio_base64, "audio/wav"
+    try:
+        if cached:
+            ai_text = cached["ai_text"]
+            yield "token", {"text": ai_text}
+            start(segmenter.feed(ai_text))
+        else:
+            parts = []
+            async for token in shared_answer_stream(user_text):
+                parts.append(token)
+                yield "token", {"text": token}
+                start(segmenter.feed(token))
+                while synthesis and synthesis[0].done():
+                    yield "audio_segment", synthesis.popleft().result()
+            ai_text = "".join(parts)
+        start(segmenter.flush())
+        yield "done", {"ai_text": ai_text, "audio_segments": segment_count}
+
+        while synthesis:
+            yield "audio_segment", await synthesis.popleft()
+    finally:
+        # Left over only if the client went away; the shared syntheses still finish into the cache
+        for task in synthesis:
+            task.cancel()
 
-    except Exception as fallback_err:
-        print("❌ Fallback TTS failed:", fallback_err)
-        return "", ""
 
 @router.post("/chat")
-async def chat_endpoint(file: UploadFile = File(None), text: str = Form(None)):
-    user_text = text or transcribe_audio(file)
+async def chat_endpoint(
+    file: UploadFile = File(None),
+    text: str = Form(None),
+    transcription_id: str = Form(None),
+    pipeline: bool = Form(False)
+):
+    user_text = text or await transcribe_audio(file, transcription_id)
     if not user_text.strip():
         return {"error": "Empty input"}
 
-    ai_text = call_openrouter(user_text)
-    ai_text = "Certainly. " + ai_text.strip()
-    audio_base64, audio_mime = generate_audio(ai_text)
+    if pipeline:
+        # Speech is synthesised per sentence while the answer is generated
+        ai_text, segments = "", []
+        async for event, data in pipelined_answer(user_text):
+            if event == "done":
+                ai_text = data["ai_text"]
+            elif event == "audio_segment":
+                segments.append(data)
+        return {"user_text": user_text, "ai_text": ai_text, "audio_segments": segments}
+
+    cached = await answer_cache.get(user_text)
+    if cached:
+        ai_text = cached["ai_text"]
+    else:
+        # Keyed like the cache, on the normalised question as sent to the LLM
+        ai_text = await answer_flights.do(answer_cache.key_for(user_text), lambda: answer_question(user_text))
+    audio_id, audio_mime = await prepare_audio(ai_text)
 
     return {
         "user_text": user_text,
         "ai_text": ai_text,
-        "audio_base64": audio_base64,
-        "audio_mime": audio_mime
+        **audio_fields(audio_id, audio_mime)
+    }
+
+
+@router.post("/chat/stream")
+async def chat_stream_endpoint(
+    file: UploadFile = File(None),
+    text: str = Form(None),
+    transcription_id: str = Form(None),
+    pipeline: bool = Form(False)
+):
+    # Transcribe before streaming starts; the upload is closed once this handler returns
+    user_text = text or await transcribe_audio(file, transcription_id)
+    if not user_text.strip():
+        return {"error": "Empty input"}
+
+    async def events():
+        yield sse_event("meta", {"user_text": user_text})
+
+        if pipeline:
+            # audio_segment events arrive in order, interleaved with the tokens
+            async for event, data in pipelined_answer(user_text):
+                yield sse_event(event, data)
+            return
+
+        cached = await answer_cache.get(user_text)
+        if cached:
+            ai_text = cached["ai_text"]
+            yield sse_event("token", {"text": ai_text})
+            yield sse_event("done", {"ai_text": ai_text})
+            yield sse_event("audio", audio_fields(*(await prepare_audio(ai_text))))
+            return
+
+        parts = []
+        async for token in shared_answer_stream(user_text):
+            parts.append(token)
+            yield sse_event("token", {"text": token})
+
+        ai_text = "".join(parts)
+        yield sse_event("done", {"ai_text": ai_text})
+        yield sse_event("audio", audio_fields(*(await prepare_audio(ai_text))))
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/chat/cache/stats")
+async def chat_cache_stats():
+    return {
+        **answer_cache.snapshot(),
+        "coalescing": {
+            "answers": answer_flights.snapshot(),
+            "answer_streams": answer_streams.snapshot(),
+            "audio": audio_flights.snapshot(),
+            "audio_streams": audio_streams.snapshot()
+        }
     }
+
+
+@router.get("/chat/providers")
+async def chat_providers():
+    # Circuit state and rolling latency/error stats per LLM provider
+    return {"providers": llm_router.snapshot()}
+
+
+@router.get("/chat/audio/{audio_id}")
+async def chat_audio(audio_id: str, request: Request):
+    if not is_audio_key(audio_id):
+        raise HTTPException(status_code=404, detail="Audio not found")
+
+    # The id is a content hash, so the clip behind it never changes
+    headers = {"ETag": f'"{audio_id}"', "Cache-Control": "public, max-age=31536000, immutable"}
+    if request.headers.get("if-none-match") in (f'"{audio_id}"', f'W/"{audio_id}"', "*"):
+        if audio_cache.lookup(audio_id) or await audio_cache.pending_text(audio_id) is not None:
+            return Response(status_code=304, headers=headers)
+
+    # Synthesised already: FileResponse handles Range requests for seeking
+    cached = audio_cache.lookup(audio_id)
+    if cached:
+        path, mime = cached
+        return FileResponse(path, media_type=mime, headers=headers)
+
+    text = await audio_cache.pending_text(audio_id)
+    if text is None:
+        raise HTTPException(status_code=404, detail="Audio not found")
+
+    cached = audio_cache.lookup(audio_key(text, FALLBACK_VOICE_ID))
+    if cached:
+        path, mime = cached
+        await settle_on_fallback(audio_id, path)
+        return FileResponse(path, media_type=mime, headers=headers)
+
+    # Pipe ElevenLabs' streaming TTS straight through so playback starts while
+    # synthesis continues. Concurrent requests for the clip share one upstream stream.
+    shared = audio_streams.share(audio_id, lambda: stream_to_cache(audio_id, text))
+    try:
+        await shared.ready()
+    except Exception as tts_err:
+        print("⚠️ ElevenLabs stream Exception:", tts_err)
+        fallback_id, mime = await generate_fallback_audio(text)
+        cached = audio_cache.lookup(fallback_id) if fallback_id else None
+        if not cached:
+            raise HTTPException(status_code=503, detail="Speech synthesis unavailable")
+        await settle_on_fallback(audio_id, cached[0])
+        return FileResponse(cached[0], media_type=mime, headers=headers)
+
+    return StreamingResponse(shared.listen(), media_type="audio/mpeg", headers=headers)
@@ -2,14 +2,14 @@
 
 from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession  # ✅ Add this
-from database import get_db
+from database import get_read_db
 from services.scheme_recommendation_service import match_schemes
 from pydanticmodels.scheme_models import SchemeRequest, SchemeResponse
 
 router = APIRouter(prefix="/api/schemes", tags=["Schemes"])
 
 @router.post("/recommend", response_model=dict)
-async def recommend_schemes(payload: SchemeRequest, db: AsyncSession = Depends(get_db)):
+async def recommend_schemes(payload: SchemeRequest, db: AsyncSession = Depends(get_read_db)):
     matched = await match_schemes(db, payload)
     result = [
         SchemeResponse(
@@ -1,16 +1,18 @@
 # backend/routers/talent.py
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
-from typing import List
+from typing import List, Optional
 
-from models import Question, UserAnswer, CareerPath, UserCareerRecommendation
-from pydanticmodels.talent_models import QuestionnaireSubmission, CareerRecommendation, QuestionOut
-from database import get_db, get_async_db
-from services.talent_logic import calculate_similarity
-from sqlalchemy.orm import selectinload
+from pydanticmodels.talent_models import (
+    QuestionnaireSubmission, CareerRecommendation, QuestionOut,
+    BatchRecommendationRequest, BatchRecommendationResponse
+)
+from database import get_db, get_async_db, get_read_db
+from services.talent_recommendation_service import recommend_careers, TALENT_BATCH_MAX_USERS
+from services.questionnaire_service import submit_answers, InvalidSubmission
+from services.question_cache import question_cache
 
 from sqlalchemy.exc import SQLAlchemyError
 
@@ -24,24 +26,16 @@ async def submit_questionnaire(
     db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        # Ensure the answers are processed correctly
-        for answer in data.answers:
-            try:
-                answer_value = float(answer.answer_value)  # Ensure the value is a float
-            except ValueError:
-                raise HTTPException(status_code=400, detail=f"Invalid answer value: {answer.answer_value}")
-
-            # Add the answer to the database
-            db.add(UserAnswer(
-                user_id=data.user_id,
-                question_id=answer.question_id,
-                answer_value=answer_value
-            ))
+        # Validated as a whole, then written with one multi-row INSERT together with the profile update
+        await submit_answers(db, data.user_id, [(answer.question_id, answer.answer_value) for answer in data.answers])
 
         # Commit changes to the database
         await db.commit()
         return {"message": "Answers submitted successfully"}
     
+    except InvalidSubmission as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     except SQLAlchemyError as e:
         await db.rollback()  # Rollback in case of any error during database operations
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
@@ -54,71 +48,13 @@ async def submit_questionnaire(
 @router.get("/recommend/{user_id}", response_model=List[CareerRecommendation])
 async def get_recommendations(user_id: int, db: AsyncSession = Depends(get_async_db)):
     try:
-        # Fetch the answers submitted by the user
-        result = await db.execute(select(UserAnswer).filter(UserAnswer.user_id == user_id))
-        answers = result.scalars().all()
+        # Build the talent profile and score it against every career path
+        recommendations = await recommend_careers(db, [user_id], top_k=5)
 
-        if not answers:
+        if user_id not in recommendations:
             raise HTTPException(status_code=404, detail="No answers found for this user.")
-        
-        # Build talent profile (categorize based on question categories)
-        scores = {}
-        counts = {}
-        question_ids = [ans.question_id for ans in answers]
-        
-        # Fetch all related questions in a single query
-        result = await db.execute(select(Question).filter(Question.id.in_(question_ids)))
-        questions = result.scalars().all()
-        
-        question_dict = {q.id: q for q in questions}
-        
-        for ans in answers:
-            question = question_dict.get(ans.question_id)
-            if question and question.category not in scores:
-                scores[question.category] = 0
-                counts[question.category] = 0
-            if question:
-                scores[question.category] += ans.answer_value
-                counts[question.category] += 1
-        
-        # Normalize the scores for each category
-        user_vector = {cat: scores[cat] / counts[cat] for cat in scores}
-
-        # Get all career paths and compare with user profile
-        result = await db.execute(
-            select(CareerPath).options(selectinload(CareerPath.courses))
-        )
-        careers = result.scalars().all()
-
-        recommendations = []
-        for career in careers:
-            score = calculate_similarity(user_vector, career.required_skills)
-            recommendations.append({
-                "career_id": career.id,
-                "title": career.name,
-                "match_score": round(score * 100, 2),
-                "courses": [
-                    {
-                        "title": course.title,
-                        "description": course.description,
-                        "link": course.link
-                    }
-                    for course in career.courses
-                ]
-            })
-
-            if score > 0:
-                db.add(UserCareerRecommendation(
-                    user_id=user_id,
-                    career_id=career.id,
-                    score=score
-                ))
-        
-        # Commit the career recommendations to the database
-        await db.commit()  # Ensure commit is awaited
-
-        sorted_recs = sorted(recommendations, key=lambda x: x["match_score"], reverse=True)[:5]
-        return sorted_recs
+
+        return recommendations[user_id]
 
     
     except SQLAlchemyError as e:
@@ -134,14 +70,49 @@ async def get_recommendations(user_id: int, db: AsyncSession = Depends(get_async
 
 
 
+# Endpoint to get career recommendations for a whole cohort in one call
+@router.post("/recommend/batch", response_model=BatchRecommendationResponse)
+async def get_batch_recommendations(
+    data: BatchRecommendationRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
+    # Keep the first occurrence of each id, in request order
+    user_ids = list(dict.fromkeys(data.user_ids))
+    if not user_ids:
+        raise HTTPException(status_code=400, detail="No user ids given.")
+    if len(user_ids) > TALENT_BATCH_MAX_USERS:
+        raise HTTPException(status_code=400, detail=f"At most {TALENT_BATCH_MAX_USERS} users per batch.")
+
+    try:
+        recommendations = await recommend_careers(db, user_ids, top_k=data.top_k)
+    except SQLAlchemyError as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+    return {
+        "recommendations": recommendations,
+        "missing_user_ids": [user_id for user_id in user_ids if user_id not in recommendations]
+    }
+
+
 # Endpoint to get all available questions
 @router.get("/questions", response_model=List[QuestionOut])
-async def get_questions(db: AsyncSession = Depends(get_async_db)):
+async def get_questions(
+    request: Request,
+    category: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_read_db)
+):
     try:
-        result = await db.execute(select(Question))
-        questions = result.scalars().all()
-        
-        return questions
+        # Served from the pre-rendered question bank; the database is only read after a question changes
+        questions = await question_cache.get(db)
+        rendered = questions.render(category, limit, offset)
+
+        headers = {"ETag": rendered.etag, "Cache-Control": "no-cache", "X-Total-Count": str(rendered.total)}
+        if rendered.etag in (tag.strip() for tag in request.headers.get("if-none-match", "").split(",")):
+            return Response(status_code=304, headers=headers)
+        return Response(content=rendered.body, media_type="application/json", headers=headers)
     
     except SQLAlchemyError as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
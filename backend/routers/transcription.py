@@ -0,0 +1,60 @@
+# backend/routers/transcription.py
+
+import asyncio
+from fastapi import APIRouter, File, HTTPException, Request, UploadFile
+from services.transcription import (
+    transcription_service, iter_upload, TranscriptionError, UploadTooLarge,
+    TRANSCRIPTION_WEBHOOK_SECRET, WEBHOOK_SECRET_HEADER
+)
+
+router = APIRouter(prefix="/transcriptions", tags=["Transcription"])
+
+# Submit a voice note; returns a job id straight away
+@router.post("")
+async def submit_transcription(file: UploadFile = File(...)):
+    try:
+        job = await transcription_service.submit(iter_upload(file))
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Transcription submit failed: {e}")
+    return job.to_dict()
+
+# Same, with the raw audio as the request body (e.g. Content-Type: audio/wav).
+# The body is piped to the provider chunk by chunk as it arrives; nothing is buffered.
+@router.post("/stream")
+async def submit_transcription_stream(request: Request):
+    try:
+        job = await transcription_service.submit(request.stream())
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Transcription submit failed: {e}")
+    return job.to_dict()
+
+# Job status; `wait` long-polls up to that many seconds for the result
+@router.get("/{job_id}")
+async def get_transcription(job_id: str, wait: float = 0):
+    job = transcription_service.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Transcription job not found")
+
+    if wait > 0 and not job.done:
+        try:
+            await transcription_service.wait(job_id, timeout=min(wait, 60))
+        except (asyncio.TimeoutError, TranscriptionError):
+            pass
+    return job.to_dict()
+
+# AssemblyAI calls this when a transcript finishes
+@router.post("/webhook")
+async def transcription_webhook(request: Request):
+    if TRANSCRIPTION_WEBHOOK_SECRET and request.headers.get(WEBHOOK_SECRET_HEADER) != TRANSCRIPTION_WEBHOOK_SECRET:
+        raise HTTPException(status_code=401, detail="Invalid webhook secret")
+
+    payload = await request.json()
+    transcript_id = payload.get("transcript_id")
+    if not transcript_id:
+        raise HTTPException(status_code=400, detail="Missing transcript_id")
+
+    return {"accepted": transcription_service.notify(transcript_id)}
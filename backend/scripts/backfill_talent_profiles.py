@@ -0,0 +1,37 @@
+# backend/scripts/backfill_talent_profiles.py
+
+# Rebuilds talent_profiles from user_answers. Run from backend/:
+#   python -m scripts.backfill_talent_profiles            (every user)
+#   python -m scripts.backfill_talent_profiles 12 40 41   (only these users)
+
+import asyncio
+import sys
+
+from sqlalchemy import text
+
+from database import AsyncSessionLocal, engine
+from services.talent_recommendation_service import rebuild_profiles
+
+
+async def backfill(user_ids=None):
+    async with AsyncSessionLocal() as db:
+        try:
+            # Offline jobs are exempt from the request-sized DB_STATEMENT_TIMEOUT_MS
+            await db.execute(text("SET LOCAL statement_timeout = 0"))
+            rows = await rebuild_profiles(db, user_ids)
+            await db.commit()
+            print(f"✅ Wrote {rows} talent profile rows")
+        except Exception as e:
+            print("❌ Error during backfill:", e)
+            await db.rollback()
+            raise
+    await engine.dispose()
+
+
+def main():
+    user_ids = [int(arg) for arg in sys.argv[1:]] or None
+    asyncio.run(backfill(user_ids))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# backend/scripts/import_answers.py
+
+# Imports questionnaire answers collected on paper. Run from backend/:
+#   python -m scripts.import_answers answers.csv
+# The CSV needs a header row with user_id, question_id and answer_value columns.
+# The whole file is validated first and loaded in one transaction with COPY.
+
+import asyncio
+import csv
+import sys
+
+from sqlalchemy import text
+
+from database import AsyncSessionLocal, engine
+from services.questionnaire_service import copy_answers
+
+
+def read_rows(path: str):
+    rows = []
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for line_number, record in enumerate(csv.DictReader(f), start=2):
+            try:
+                rows.append((int(record["user_id"]), int(record["question_id"]), float(record["answer_value"])))
+            except (KeyError, TypeError, ValueError):
+                raise SystemExit(f"❌ {path}:{line_number}: expected integer user_id and question_id and a numeric answer_value")
+    return rows
+
+
+async def import_answers(path: str):
+    rows = read_rows(path)
+    async with AsyncSessionLocal() as db:
+        try:
+            # Offline jobs are exempt from the request-sized DB_STATEMENT_TIMEOUT_MS
+            await db.execute(text("SET LOCAL statement_timeout = 0"))
+            loaded = await copy_answers(db, rows)
+            await db.commit()
+            print(f"✅ Imported {loaded} answers for {len({row[0] for row in rows})} users")
+        except Exception as e:
+            print("❌ Error during import:", e)
+            await db.rollback()
+            raise
+    await engine.dispose()
+
+
+def main():
+    if len(sys.argv) != 2:
+        raise SystemExit("Usage: python -m scripts.import_answers <answers.csv>")
+    asyncio.run(import_answers(sys.argv[1]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+# backend/services/answer_cache.py
+
+import hashlib
+import json
+import os
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Set
+
+# "memory" (per worker), "redis" (shared between workers) or "off"
+ANSWER_CACHE_BACKEND = os.getenv("ANSWER_CACHE_BACKEND", "memory").lower()
+ANSWER_CACHE_TTL = int(os.getenv("ANSWER_CACHE_TTL", 24 * 60 * 60))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", 2048))
+# Minimum trigram similarity (0-1) for a near-duplicate hit; 0 disables near-duplicate mode
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", 0))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+
+def normalize_question(question: str) -> str:
+    """Case, punctuation and whitespace differences should not cause a cache miss."""
+    question = unicodedata.normalize("NFKC", question).lower()
+    question = re.sub(r"[^\w\s]", " ", question)
+    return " ".join(question.split())
+
+
+# -----------------------
+# Storage backends
+# -----------------------
+
+class CacheBackend:
+    """Interface for answer storage. Values are JSON-serialisable dicts."""
+
+    async def get(self, key: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: dict):
+        raise NotImplementedError
+
+    async def delete(self, key: str):
+        raise NotImplementedError
+
+
+class NullBackend(CacheBackend):
+    """Used when caching is switched off: every lookup misses."""
+
+    async def get(self, key: str) -> Optional[dict]:
+        return None
+
+    async def set(self, key: str, value: dict):
+        pass
+
+    async def delete(self, key: str):
+        pass
+
+
+class InMemoryBackend(CacheBackend):
+    """Per-process LRU with a TTL on every entry. Lookups and stores are O(1)."""
+
+    def __init__(self, max_entries: int = ANSWER_CACHE_MAX_ENTRIES, ttl: int = ANSWER_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: dict):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def delete(self, key: str):
+        self._entries.pop(key, None)
+
+
+class RedisBackend(CacheBackend):
+    """
+    Shared store for multiple workers. Entries expire via Redis TTLs; configure
+    `maxmemory-policy allkeys-lru` on the server for LRU eviction.
+    """
+
+    def __init__(self, url: str = REDIS_URL, ttl: int = ANSWER_CACHE_TTL, prefix: str = "answer:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("ANSWER_CACHE_BACKEND=redis needs the 'redis' package. Install it with pip install redis.")
+        self._redis = redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[dict]:
+        raw = await self._redis.get(self.prefix + key)
+        return json.loads(raw) if raw else None
+
+    async def set(self, key: str, value: dict):
+        await self._redis.set(self.prefix + key, json.dumps(value), ex=self.ttl)
+
+    async def delete(self, key: str):
+        await self._redis.delete(self.prefix + key)
+
+
+# -----------------------
+# Near-duplicate lookup
+# -----------------------
+
+class NgramIndex:
+    """
+    Character-trigram index over normalised questions. Finds the most similar
+    cached question by Jaccard similarity, touching only questions that share a trigram.
+    """
+
+    def __init__(self, max_entries: int = ANSWER_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._grams: "OrderedDict[str, Set[str]]" = OrderedDict()
+        self._postings: Dict[str, Set[str]] = {}
+
+    @staticmethod
+    def trigrams(text: str) -> Set[str]:
+        padded = f"  {text} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    def add(self, key: str, question: str):
+        self.remove(key)
+        grams = self.trigrams(question)
+        self._grams[key] = grams
+        for gram in grams:
+            self._postings.setdefault(gram, set()).add(key)
+        while len(self._grams) > self.max_entries:
+            self.remove(next(iter(self._grams)))
+
+    def remove(self, key: str):
+        grams = self._grams.pop(key, None)
+        for gram in grams or ():
+            keys = self._postings.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._postings[gram]
+
+    def most_similar(self, question: str, threshold: float) -> Optional[str]:
+        grams = self.trigrams(question)
+        overlaps: Dict[str, int] = {}
+        for gram in grams:
+            for key in self._postings.get(gram, ()):
+                overlaps[key] = overlaps.get(key, 0) + 1
+
+        best_key, best_score = None, threshold
+        for key, overlap in overlaps.items():
+            score = overlap / (len(grams) + len(self._grams[key]) - overlap)
+            if score >= best_score:
+                best_key, best_score = key, score
+        return best_key
+
+
+# -----------------------
+# Cache facade
+# -----------------------
+
+class AnswerCache:
+    """
+    Chat answers keyed on the normalised question as sent to the LLM.
+    Entries hold only the answer text; its audio is found in the audio cache
+    by content address.
+    """
+
+    def __init__(self, backend: CacheBackend, prompt_builder: Callable[[str], str], similarity: float = ANSWER_CACHE_SIMILARITY):
+        self.backend = backend
+        self.prompt_builder = prompt_builder
+        self.similarity = similarity
+        self.index = NgramIndex() if similarity > 0 else None
+        self.stats = {"hits": 0, "near_hits": 0, "misses": 0, "stores": 0}
+
+    def key_for(self, question: str) -> str:
+        prompt = self.prompt_builder(normalize_question(question))
+        return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+    async def get(self, question: str) -> Optional[dict]:
+        key = self.key_for(question)
+        value = await self.backend.get(key)
+        if value is not None:
+            self.stats["hits"] += 1
+            return value
+
+        if self.index is not None:
+            similar_key = self.index.most_similar(normalize_question(question), self.similarity)
+            if similar_key is not None:
+                value = await self.backend.get(similar_key)
+                if value is not None:
+                    self.stats["near_hits"] += 1
+                    return value
+                # Expired or evicted from the backend
+                self.index.remove(similar_key)
+
+        self.stats["misses"] += 1
+        return None
+
+    async def set(self, question: str, value: dict):
+        key = self.key_for(question)
+        await self.backend.set(key, value)
+        if self.index is not None:
+            self.index.add(key, normalize_question(question))
+        self.stats["stores"] += 1
+
+    def snapshot(self) -> dict:
+        lookups = self.stats["hits"] + self.stats["near_hits"] + self.stats["misses"]
+        hit_rate = (self.stats["hits"] + self.stats["near_hits"]) / lookups if lookups else 0.0
+        return {**self.stats, "backend": ANSWER_CACHE_BACKEND, "hit_rate": round(hit_rate, 4)}
+
+
+def create_answer_cache(prompt_builder: Callable[[str], str]) -> AnswerCache:
+    if ANSWER_CACHE_BACKEND == "off":
+        backend = NullBackend()
+    elif ANSWER_CACHE_BACKEND == "redis":
+        backend = RedisBackend()
+    else:
+        backend = InMemoryBackend()
+    return AnswerCache(backend, prompt_builder)
@@ -0,0 +1,223 @@
+# backend/services/audio_cache.py
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from typing import Optional, Tuple
+
+AUDIO_CACHE_DIR = os.getenv("AUDIO_CACHE_DIR", os.path.join(tempfile.gettempdir(), "sahaya-sakhi-audio"))
+AUDIO_CACHE_MAX_BYTES = int(os.getenv("AUDIO_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+# Pending text younger than this is never evicted, so a freshly returned audio_url stays valid
+AUDIO_CACHE_PENDING_GRACE = float(os.getenv("AUDIO_CACHE_PENDING_GRACE", "3600"))
+
+EXTENSIONS = {"audio/mpeg": ".mp3", "audio/wav": ".wav"}
+MIME_TYPES = {ext: mime for mime, ext in EXTENSIONS.items()}
+
+_KEY_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+def audio_key(text: str, voice_id: Optional[str], voice_settings: Optional[dict] = None) -> str:
+    """Content address of a synthesised clip: same text, voice and settings give the same key."""
+    material = json.dumps({"text": text, "voice": voice_id, "settings": voice_settings or {}}, sort_keys=True)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def is_audio_key(value: str) -> bool:
+    return bool(_KEY_PATTERN.match(value))
+
+
+class AudioCacheWriter:
+    """
+    Incrementally writes one clip while it is being streamed to a client.
+    Nothing is visible under the key until commit(); abort() discards the partial file.
+    Writes and the commit (which may evict) run in a worker thread.
+    """
+
+    def __init__(self, cache: "AudioCache", key: str, mime: str):
+        self.cache = cache
+        self.key = key
+        self.mime = mime
+        self.size = 0
+        fd, self.tmp_path = tempfile.mkstemp(dir=cache.directory, suffix=".part")
+        self._file = os.fdopen(fd, "wb")
+
+    def _write(self, chunk: bytes):
+        self._file.write(chunk)
+        self.size += len(chunk)
+
+    def _commit(self) -> str:
+        self._file.close()
+        path = os.path.join(self.cache.directory, self.key + EXTENSIONS[self.mime])
+        os.replace(self.tmp_path, path)
+        self.cache._added(self.size)
+        return path
+
+    async def write(self, chunk: bytes):
+        await asyncio.to_thread(self._write, chunk)
+
+    async def commit(self) -> str:
+        return await asyncio.to_thread(self._commit)
+
+    def abort(self):
+        self._file.close()
+        if os.path.exists(self.tmp_path):
+            os.unlink(self.tmp_path)
+
+
+class AudioCache:
+    """
+    Disk-backed store of synthesised audio, one file per content key.
+    Hits refresh the file's mtime, and the least recently used files are
+    evicted once the directory grows past `max_bytes`.
+    Text that has been promised a key but not synthesised yet is kept
+    next to the clips as `<key>.pending`, so any worker can synthesise it on request.
+    Pending files count towards `max_bytes`; ones nobody fetched are evicted like
+    clips once they are older than `pending_grace`.
+    """
+
+    def __init__(self, directory: str = AUDIO_CACHE_DIR, max_bytes: int = AUDIO_CACHE_MAX_BYTES,
+                 pending_grace: float = AUDIO_CACHE_PENDING_GRACE):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.pending_grace = pending_grace
+        os.makedirs(directory, exist_ok=True)
+        self._total_bytes = sum(entry.stat().st_size for entry in os.scandir(directory) if entry.is_file())
+        # Guards _total_bytes and eviction, which run on the event loop and in worker threads
+        self._size_lock = threading.Lock()
+
+    def lookup(self, key: str) -> Optional[Tuple[str, str]]:
+        """Returns (path, mime) for a cached clip, or None."""
+        for ext, mime in MIME_TYPES.items():
+            path = os.path.join(self.directory, key + ext)
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                continue
+            return path, mime
+        return None
+
+    def _write(self, key: str, data: bytes, mime: str) -> str:
+        path = os.path.join(self.directory, key + EXTENSIONS[mime])
+        # Write to a temporary name first so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        self._added(len(data))
+        return path
+
+    def _added(self, size: int):
+        with self._size_lock:
+            self._total_bytes += size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _removed(self, size: int):
+        with self._size_lock:
+            self._total_bytes -= size
+
+    def _evict(self):
+        # Called with _size_lock held
+        entries = [entry for entry in os.scandir(self.directory) if entry.is_file() and not entry.name.endswith(".part")]
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        total = sum(entry.stat().st_size for entry in entries)
+        # Evict down to 90% so we are not evicting on every write
+        target = self.max_bytes * 0.9
+        fresh_after = time.time() - self.pending_grace
+        for entry in entries:
+            if total <= target:
+                break
+            if entry.name.endswith(".pending") and entry.stat().st_mtime > fresh_after:
+                continue
+            try:
+                size = entry.stat().st_size
+                os.unlink(entry.path)
+                total -= size
+            except FileNotFoundError:
+                pass
+        self._total_bytes = total
+        print(f"🧹 Audio cache evicted down to {total} bytes")
+
+    async def store(self, key: str, data: bytes, mime: str) -> str:
+        return await asyncio.to_thread(self._write, key, data, mime)
+
+    async def writer(self, key: str, mime: str) -> AudioCacheWriter:
+        return await asyncio.to_thread(AudioCacheWriter, self, key, mime)
+
+    def _alias(self, key: str, source_path: str) -> str:
+        path = os.path.join(self.directory, key + os.path.splitext(source_path)[1])
+        if os.path.exists(path):
+            return path
+        # Hard link where the filesystem allows it, so the clip is not stored twice
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        os.close(fd)
+        try:
+            os.unlink(tmp_path)
+            try:
+                os.link(source_path, tmp_path)
+            except OSError:
+                shutil.copyfile(source_path, tmp_path)
+            # A no-op if another caller has linked the same inode to `path` meanwhile
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+        self._added(os.path.getsize(path))
+        return path
+
+    async def alias(self, key: str, source_path: str) -> str:
+        """Serves an already cached clip under another key as well."""
+        return await asyncio.to_thread(self._alias, key, source_path)
+
+    def _pending_path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".pending")
+
+    def _register_pending(self, key: str, text: str):
+        path = self._pending_path(key)
+        try:
+            replaced = os.path.getsize(path)
+        except FileNotFoundError:
+            replaced = 0
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        self._removed(replaced)
+        self._added(os.path.getsize(path))
+
+    def _pending_text(self, key: str) -> Optional[str]:
+        try:
+            with open(self._pending_path(key), encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _clear_pending(self, key: str):
+        path = self._pending_path(key)
+        try:
+            size = os.path.getsize(path)
+            os.unlink(path)
+        except FileNotFoundError:
+            return
+        self._removed(size)
+
+    async def register_pending(self, key: str, text: str):
+        await asyncio.to_thread(self._register_pending, key, text)
+
+    async def pending_text(self, key: str) -> Optional[str]:
+        return await asyncio.to_thread(self._pending_text, key)
+
+    async def clear_pending(self, key: str):
+        await asyncio.to_thread(self._clear_pending, key)
+
+
+audio_cache = AudioCache()
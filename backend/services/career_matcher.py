@@ -0,0 +1,117 @@
+# backend/services/career_matcher.py
+
+import hashlib
+import math
+import os
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.future import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from models import CareerPath, Course
+from services.table_cache import TableCache
+
+CAREER_MATCHER_TTL = float(os.getenv("CAREER_MATCHER_TTL", "300"))
+
+
+class CareerMatcher:
+    """
+    All careers' `required_skills` as one L2-normalised matrix over a fixed,
+    sorted category vocabulary. A user profile is scored against every career
+    with a single product, giving the same cosine similarity as
+    `talent_logic.calculate_similarity`.
+    """
+
+    def __init__(self, careers: Sequence[CareerPath]):
+        self.vocabulary: List[str] = sorted({category for career in careers for category in (career.required_skills or {})})
+        self.columns: Dict[str, int] = {category: i for i, category in enumerate(self.vocabulary)}
+        self.career_ids = np.array([career.id for career in careers], dtype=np.int64)
+        # Everything the response needs, so requests never touch the ORM objects
+        self.careers = [
+            {
+                "career_id": career.id,
+                "title": career.name,
+                "courses": [
+                    {"title": course.title, "description": course.description, "link": course.link}
+                    for course in career.courses
+                ]
+            }
+            for career in careers
+        ]
+
+        matrix = np.zeros((len(careers), len(self.vocabulary)), dtype=np.float64)
+        for row, career in enumerate(careers):
+            for category, weight in (career.required_skills or {}).items():
+                matrix[row, self.columns[category]] = float(weight)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        # Careers without any skills keep a zero row and score 0, as before
+        self.matrix = np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+        # Changes whenever a career is added, removed or re-weighted
+        digest = hashlib.sha256()
+        digest.update("\x1f".join(self.vocabulary).encode("utf-8"))
+        digest.update(self.career_ids.tobytes())
+        digest.update(self.matrix.tobytes())
+        self.fingerprint = digest.hexdigest()
+
+    def __len__(self) -> int:
+        return len(self.careers)
+
+    def vectorize(self, profiles: Sequence[Dict[str, float]]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Projects profiles onto the vocabulary. The magnitude is taken over every
+        category the user has, including ones no career asks for, so scores match
+        the dict-based cosine.
+        """
+        vectors = np.zeros((len(profiles), len(self.vocabulary)), dtype=np.float64)
+        magnitudes = np.zeros(len(profiles), dtype=np.float64)
+        for row, profile in enumerate(profiles):
+            for category, value in profile.items():
+                column = self.columns.get(category)
+                if column is not None:
+                    vectors[row, column] = value
+            magnitudes[row] = math.sqrt(sum(value ** 2 for value in profile.values()))
+        return vectors, magnitudes
+
+    def score_many(self, profiles: Sequence[Dict[str, float]]) -> np.ndarray:
+        """Returns a (users x careers) matrix of cosine similarities."""
+        vectors, magnitudes = self.vectorize(profiles)
+        scores = vectors @ self.matrix.T
+        return np.divide(scores, magnitudes[:, None], out=np.zeros_like(scores), where=magnitudes[:, None] > 0)
+
+    def score(self, profile: Dict[str, float]) -> np.ndarray:
+        """Returns the cosine similarity of one profile to every career."""
+        return self.score_many([profile])[0]
+
+    @staticmethod
+    def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+        """Indices of the k best careers, best first; ties keep career order."""
+        k = min(k, len(scores))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64)
+        if k < len(scores):
+            candidates = np.argpartition(-scores, k - 1)[:k]
+            # argpartition splits ties at the cut arbitrarily; take every career tied with the k-th
+            threshold = scores[candidates].min()
+            candidates = np.flatnonzero(scores >= threshold)
+        else:
+            candidates = np.arange(len(scores))
+        order = np.lexsort((candidates, -scores[candidates]))
+        return candidates[order][:k]
+
+    def recommendation(self, index: int, score: float) -> dict:
+        return {**self.careers[index], "match_score": round(float(score) * 100, 2)}
+
+
+async def load_career_matcher(db: AsyncSession) -> CareerMatcher:
+    result = await db.execute(
+        select(CareerPath).options(selectinload(CareerPath.courses)).order_by(CareerPath.id)
+    )
+    matcher = CareerMatcher(result.scalars().all())
+    print(f"🧮 Career matcher rebuilt with {len(matcher)} careers over {len(matcher.vocabulary)} categories")
+    return matcher
+
+
+career_matcher = TableCache("careers", load_career_matcher, [CareerPath, Course], CAREER_MATCHER_TTL)
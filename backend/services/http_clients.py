@@ -0,0 +1,145 @@
+# backend/services/http_clients.py
+
+import asyncio
+import os
+import random
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+
+import httpx
+
+# Status codes worth another attempt; everything else is returned to the caller as-is
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+class UpstreamConfig:
+    """
+    Connection settings for one upstream API.
+    Every value can be overridden with HTTP_<NAME>_<SETTING>, e.g. HTTP_OPENROUTER_TIMEOUT=30.
+    """
+
+    def __init__(self, name: str, base_url: str, timeout: float, concurrency: int,
+                 retries: int = 2, backoff: float = 0.5):
+        prefix = f"HTTP_{name.upper()}_"
+        self.name = name
+        self.base_url = os.getenv(prefix + "BASE_URL", base_url)
+        self.timeout = float(os.getenv(prefix + "TIMEOUT", timeout))
+        self.connect_timeout = float(os.getenv(prefix + "CONNECT_TIMEOUT", 5))
+        self.concurrency = int(os.getenv(prefix + "CONCURRENCY", concurrency))
+        self.max_keepalive = int(os.getenv(prefix + "MAX_KEEPALIVE", self.concurrency))
+        self.retries = int(os.getenv(prefix + "RETRIES", retries))
+        self.backoff = float(os.getenv(prefix + "BACKOFF", backoff))
+
+
+UPSTREAMS = {
+    "openrouter": UpstreamConfig("openrouter", "https://openrouter.ai/api/v1", timeout=60, concurrency=32),
+    "ollama": UpstreamConfig("ollama", os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"), timeout=120, concurrency=4),
+    "assemblyai": UpstreamConfig("assemblyai", "https://api.assemblyai.com/v2", timeout=30, concurrency=16),
+    "elevenlabs": UpstreamConfig("elevenlabs", "https://api.elevenlabs.io/v1", timeout=60, concurrency=8),
+}
+
+
+class UpstreamClient:
+    """
+    Keep-alive connection pool for one upstream, with a concurrency cap
+    and retry with exponential backoff on transport errors and retryable statuses.
+    """
+
+    def __init__(self, config: UpstreamConfig):
+        self.config = config
+        self.client = httpx.AsyncClient(
+            base_url=config.base_url,
+            timeout=httpx.Timeout(config.timeout, connect=config.connect_timeout),
+            limits=httpx.Limits(
+                max_connections=config.concurrency,
+                max_keepalive_connections=config.max_keepalive,
+            ),
+        )
+        self._semaphore = asyncio.Semaphore(config.concurrency)
+
+    def _delay(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        return self.config.backoff * (2 ** attempt) * (0.5 + random.random())
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        # A streamed request body can only be sent once, so it is never retried
+        retries = self.config.retries if isinstance(kwargs.get("content"), (bytes, str, type(None))) else 0
+        attempt = 0
+        while True:
+            try:
+                async with self._semaphore:
+                    response = await self.client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                if attempt >= retries:
+                    raise
+                print(f"🔁 {self.config.name} {method} {url} failed ({e!r}), retrying...")
+                await asyncio.sleep(self._delay(attempt))
+                attempt += 1
+                continue
+
+            if response.status_code in RETRY_STATUSES and attempt < retries:
+                print(f"🔁 {self.config.name} {method} {url} returned {response.status_code}, retrying...")
+                await asyncio.sleep(self._delay(attempt, response))
+                attempt += 1
+                continue
+
+            return response
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, **kwargs) -> AsyncIterator[httpx.Response]:
+        """
+        Like request(), but yields the response before its body is read.
+        Only connection failures are retried; once bytes flow the caller owns the outcome.
+        The concurrency slot is held until the body is closed.
+        """
+        async with self._semaphore:
+            attempt = 0
+            while True:
+                try:
+                    response = await self.client.send(self.client.build_request(method, url, **kwargs), stream=True)
+                    break
+                except httpx.TransportError as e:
+                    if attempt >= self.config.retries:
+                        raise
+                    print(f"🔁 {self.config.name} {method} {url} stream failed ({e!r}), retrying...")
+                    await asyncio.sleep(self._delay(attempt))
+                    attempt += 1
+            try:
+                yield response
+            finally:
+                await response.aclose()
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+_clients: Dict[str, UpstreamClient] = {}
+
+
+async def init_http_clients():
+    for name, config in UPSTREAMS.items():
+        if name not in _clients:
+            _clients[name] = UpstreamClient(config)
+
+
+async def close_http_clients():
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
+
+
+def get_client(name: str) -> UpstreamClient:
+    # Created in the app lifespan; fall back to lazy creation for scripts and tests
+    client = _clients.get(name)
+    if client is None:
+        client = _clients[name] = UpstreamClient(UPSTREAMS[name])
+    return client
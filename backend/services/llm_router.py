@@ -0,0 +1,376 @@
+# backend/services/llm_router.py
+
+import asyncio
+import json
+import math
+import os
+import time
+from collections import deque
+from typing import AsyncIterator, Dict, List, Optional
+
+from services.http_clients import get_client
+
+OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
+
+# Priority list of "<provider>:<model>", e.g. "openrouter:mistralai/mistral-7b-instruct,ollama:tinyllama"
+LLM_PROVIDERS = os.getenv("LLM_PROVIDERS", "openrouter:mistralai/mistral-7b-instruct,ollama:tinyllama")
+# Consecutive failures that open a provider's circuit, and how long it stays open
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", 3))
+LLM_BREAKER_RESET = float(os.getenv("LLM_BREAKER_RESET", 30))
+# Latency samples kept per provider
+LLM_STATS_WINDOW = int(os.getenv("LLM_STATS_WINDOW", 50))
+# The next provider is fired once the current one runs past its p95 latency,
+# clamped to this range (the default is used until there are enough samples)
+LLM_HEDGE_DEFAULT = float(os.getenv("LLM_HEDGE_DEFAULT", 8))
+LLM_HEDGE_MIN = float(os.getenv("LLM_HEDGE_MIN", 1))
+LLM_HEDGE_MAX = float(os.getenv("LLM_HEDGE_MAX", 20))
+LLM_HEDGE_MIN_SAMPLES = 10
+
+
+class LLMUnavailable(Exception):
+    pass
+
+
+class LLMStreamBroken(Exception):
+    """A provider stream failed after it had already sent text; the answer is incomplete."""
+
+
+class CircuitBreaker:
+    """
+    closed: calls flow. open: calls are skipped until `reset_timeout` has passed.
+    half_open: one trial call is let through; its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int = LLM_BREAKER_FAILURES, reset_timeout: float = LLM_BREAKER_RESET):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_running = False
+
+    def available(self) -> bool:
+        """Whether a call could go through right now, without claiming the half-open trial."""
+        if self.state == "closed":
+            return True
+        if self.state == "open":
+            return time.monotonic() - self.opened_at >= self.reset_timeout
+        return not self._trial_running
+
+    def allow(self) -> bool:
+        """Claims permission for one call; in half-open state only one caller gets it."""
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = "half_open"
+        if self.state == "half_open" and not self._trial_running:
+            self._trial_running = True
+            return True
+        return False
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self._trial_running = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_running = False
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                print(f"🚫 Circuit opened after {self.failures} failure(s)")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def release(self):
+        """A trial call was cancelled before it produced an outcome."""
+        self._trial_running = False
+
+
+class RollingStats:
+    """Outcome and latency of the last `window` calls."""
+
+    def __init__(self, window: int = LLM_STATS_WINDOW):
+        self.samples = deque(maxlen=window)
+
+    def record(self, ok: bool, latency: float):
+        self.samples.append((ok, latency))
+
+    def error_rate(self) -> float:
+        if not self.samples:
+            return 0.0
+        return sum(1 for ok, _ in self.samples if not ok) / len(self.samples)
+
+    def p95(self) -> Optional[float]:
+        latencies = sorted(latency for ok, latency in self.samples if ok)
+        if len(latencies) < LLM_HEDGE_MIN_SAMPLES:
+            return None
+        return latencies[min(len(latencies) - 1, math.ceil(0.95 * len(latencies)) - 1)]
+
+
+class LLMProvider:
+    kind = "base"
+
+    def __init__(self, model: str):
+        self.model = model
+        self.name = f"{self.kind}:{model}"
+        self.breaker = CircuitBreaker()
+        self.stats = RollingStats()
+
+    async def complete(self, formatted_prompt: str) -> str:
+        raise NotImplementedError
+
+    def stream(self, formatted_prompt: str) -> AsyncIterator[str]:
+        raise NotImplementedError
+
+    def hedge_delay(self) -> float:
+        p95 = self.stats.p95()
+        if p95 is None:
+            return LLM_HEDGE_DEFAULT
+        return min(max(p95, LLM_HEDGE_MIN), LLM_HEDGE_MAX)
+
+    def snapshot(self) -> dict:
+        p95 = self.stats.p95()
+        return {
+            "name": self.name,
+            "circuit": self.breaker.state,
+            "error_rate": round(self.stats.error_rate(), 4),
+            "p95_seconds": round(p95, 3) if p95 is not None else None,
+            "samples": len(self.stats.samples)
+        }
+
+
+class OpenRouterProvider(LLMProvider):
+    kind = "openrouter"
+
+    def _request(self, formatted_prompt: str, stream: bool) -> dict:
+        return {
+            "headers": {
+                "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+                "Content-Type": "application/json"
+            },
+            "json": {
+                "model": self.model,
+                "messages": [{"role": "user", "content": formatted_prompt}],
+                "max_tokens": 512,
+                "temperature": 0.7,
+                "stream": stream
+            }
+        }
+
+    async def complete(self, formatted_prompt: str) -> str:
+        print(f"📡 Sending request to OpenRouter ({self.model})...")
+        response = await get_client("openrouter").post("/chat/completions", **self._request(formatted_prompt, False))
+        response.raise_for_status()
+        data = response.json()
+        if "choices" not in data:
+            print("⚠️ OpenRouter response missing 'choices':", data)
+            raise Exception("No choices returned")
+        print("✅ OpenRouter response received")
+        return data["choices"][0]["message"]["content"]
+
+    async def stream(self, formatted_prompt: str) -> AsyncIterator[str]:
+        print(f"📡 Streaming request to OpenRouter ({self.model})...")
+        async with get_client("openrouter").stream("POST", "/chat/completions", **self._request(formatted_prompt, True)) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                # SSE: skip keep-alive comments such as ": OPENROUTER PROCESSING"
+                if not line.startswith("data:"):
+                    continue
+                payload = line[len("data:"):].strip()
+                if payload == "[DONE]":
+                    break
+                chunk = json.loads(payload)
+                if "error" in chunk:
+                    raise Exception(chunk["error"])
+                token = (chunk.get("choices") or [{}])[0].get("delta", {}).get("content")
+                if token:
+                    yield token
+        print("✅ OpenRouter stream finished")
+
+
+class OllamaProvider(LLMProvider):
+    kind = "ollama"
+
+    def _request(self, formatted_prompt: str, stream: bool) -> dict:
+        return {
+            "json": {
+                "model": self.model,
+                "prompt": formatted_prompt,
+                "stream": stream,
+                "num_predict": 2048
+            }
+        }
+
+    async def complete(self, formatted_prompt: str) -> str:
+        print(f"🤖 Querying local {self.model} via Ollama...")
+        response = await get_client("ollama").post("/api/generate", **self._request(formatted_prompt, False))
+        response.raise_for_status()
+        text = response.json().get("response")
+        if not text:
+            raise Exception(f"{self.model} gave no response")
+        print(f"✅ {self.model} responded")
+        return text
+
+    async def stream(self, formatted_prompt: str) -> AsyncIterator[str]:
+        print(f"🤖 Streaming from local {self.model} via Ollama...")
+        async with get_client("ollama").stream("POST", "/api/generate", **self._request(formatted_prompt, True)) as response:
+            response.raise_for_status()
+            # Ollama streams one JSON object per line
+            async for line in response.aiter_lines():
+                if not line.strip():
+                    continue
+                chunk = json.loads(line)
+                token = chunk.get("response")
+                if token:
+                    yield token
+                if chunk.get("done"):
+                    break
+        print(f"✅ {self.model} stream finished")
+
+
+PROVIDER_KINDS = {
+    "openrouter": OpenRouterProvider,
+    "ollama": OllamaProvider,
+}
+
+
+def parse_providers(spec: str) -> List[LLMProvider]:
+    providers = []
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        kind, _, model = entry.partition(":")
+        if kind not in PROVIDER_KINDS or not model:
+            raise RuntimeError(f"Invalid LLM_PROVIDERS entry '{entry}'. Use <openrouter|ollama>:<model>.")
+        providers.append(PROVIDER_KINDS[kind](model))
+    return providers
+
+
+class LLMRouter:
+    """
+    Sends a prompt to the first healthy provider in priority order.
+    Providers with an open circuit are skipped; if the current provider is
+    still running past its p95 latency the next one is fired as a hedge,
+    and the first successful answer wins.
+    """
+
+    def __init__(self, providers: List[LLMProvider]):
+        self.providers = providers
+
+    def _candidates(self) -> List[LLMProvider]:
+        """
+        Providers to try, in priority order. Each one claims its breaker only when it is
+        actually called. With every circuit open we still try them all rather than fail without asking anyone.
+        """
+        healthy = [provider for provider in self.providers if provider.breaker.available()]
+        return healthy or list(self.providers)
+
+    def _claim(self, provider: LLMProvider, forced: bool) -> bool:
+        return forced or provider.breaker.allow()
+
+    async def _timed(self, provider: LLMProvider, formatted_prompt: str) -> str:
+        started = time.monotonic()
+        try:
+            result = await provider.complete(formatted_prompt)
+        except asyncio.CancelledError:
+            # Lost a hedge race; says nothing about the provider's health
+            provider.breaker.release()
+            raise
+        except Exception:
+            provider.stats.record(False, time.monotonic() - started)
+            provider.breaker.record_failure()
+            raise
+        provider.stats.record(True, time.monotonic() - started)
+        provider.breaker.record_success()
+        return result
+
+    async def complete(self, formatted_prompt: str) -> str:
+        candidates = self._candidates()
+        forced = not any(provider.breaker.available() for provider in self.providers)
+        pending: Dict[asyncio.Task, LLMProvider] = {}
+        errors = []
+        launched = 0
+        current: Optional[LLMProvider] = None
+
+        def launch() -> bool:
+            nonlocal launched, current
+            while launched < len(candidates):
+                provider = candidates[launched]
+                launched += 1
+                if self._claim(provider, forced):
+                    current = provider
+                    pending[asyncio.create_task(self._timed(provider, formatted_prompt))] = provider
+                    return True
+            return False
+
+        launch()
+        try:
+            while pending:
+                hedge_after = current.hedge_delay() if launched < len(candidates) else None
+                done, _ = await asyncio.wait(pending, timeout=hedge_after, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    print(f"⏱️ {current.name} is slower than usual, hedging with the next provider")
+                    launch()
+                    continue
+
+                for task in done:
+                    provider = pending.pop(task)
+                    if task.exception() is None:
+                        return task.result()
+                    print(f"{provider.name} failed: {task.exception()}")
+                    errors.append(f"{provider.name}: {task.exception()}")
+
+                if not pending and launch():
+                    print(f"🔁 Switching to {current.name}...")
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise LLMUnavailable("; ".join(errors))
+
+    async def stream(self, formatted_prompt: str) -> AsyncIterator[str]:
+        """
+        Streams from the first provider that produces a token. A provider that
+        fails before its first token is skipped; once text has been sent we
+        cannot switch models mid-answer, so a later failure raises LLMStreamBroken.
+        """
+        errors = []
+        forced = not any(provider.breaker.available() for provider in self.providers)
+        for provider in self._candidates():
+            if not self._claim(provider, forced):
+                continue
+            started = time.monotonic()
+            first_token = False
+            outcome = False
+            try:
+                async for token in provider.stream(formatted_prompt):
+                    if not first_token:
+                        first_token = outcome = True
+                        provider.breaker.record_success()
+                    yield token
+                if first_token:
+                    provider.stats.record(True, time.monotonic() - started)
+                    return
+                raise Exception("No tokens returned")
+            except Exception as e:
+                provider.stats.record(False, time.monotonic() - started)
+                if first_token:
+                    print(f"{provider.name} stream broke mid-answer: {e}")
+                    raise LLMStreamBroken(f"{provider.name}: {e}") from e
+                outcome = True
+                provider.breaker.record_failure()
+                print(f"{provider.name} stream failed: {e}")
+                errors.append(f"{provider.name}: {e}")
+            finally:
+                # The client went away before the provider produced anything
+                if not outcome:
+                    provider.breaker.release()
+        raise LLMUnavailable("; ".join(errors))
+
+    def snapshot(self) -> List[dict]:
+        return [provider.snapshot() for provider in self.providers]
+
+
+llm_router = LLMRouter(parse_providers(LLM_PROVIDERS))
@@ -0,0 +1,71 @@
+# backend/services/password_hasher.py
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+
+# bcrypt releases the GIL while hashing, so threads give real parallelism
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+# Hashes allowed to wait for a worker before new ones are turned away with 429
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", 32))
+# Work factor for new hashes; stored hashes with another cost are upgraded on the next login
+PASSWORD_BCRYPT_ROUNDS = int(os.getenv("PASSWORD_BCRYPT_ROUNDS", 12))
+PASSWORD_HASH_RETRY_AFTER = 1
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=PASSWORD_BCRYPT_ROUNDS)
+
+
+class PasswordHasherBusy(Exception):
+    pass
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt off the event loop on a small thread pool. At most
+    `workers + max_queue` operations are admitted at once; beyond that callers
+    get PasswordHasherBusy instead of queueing without bound.
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_queue: int = PASSWORD_HASH_MAX_QUEUE):
+        self.workers = workers
+        self.capacity = workers + max_queue
+        self.in_flight = 0
+        self.rejected = 0
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def _ensure_started(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._pool
+
+    async def _run(self, fn, *args):
+        if self.in_flight >= self.capacity:
+            self.rejected += 1
+            raise PasswordHasherBusy()
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._ensure_started(), fn, *args)
+        finally:
+            self.in_flight -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(pwd_context.hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Returns (valid, new_hash); new_hash is set when the stored hash uses an outdated cost."""
+        return await self._run(pwd_context.verify_and_update, password, hashed_password)
+
+    def snapshot(self) -> dict:
+        return {"workers": self.workers, "capacity": self.capacity, "in_flight": self.in_flight, "rejected": self.rejected}
+
+    async def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+password_hasher = PasswordHasher()
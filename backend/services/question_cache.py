@@ -0,0 +1,71 @@
+# backend/services/question_cache.py
+
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.future import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Question
+from pydanticmodels.talent_models import QuestionOut
+from services.table_cache import TableCache
+
+QUESTION_CACHE_TTL = float(os.getenv("QUESTION_CACHE_TTL", "300"))
+# Rendered category/page variants kept per version
+QUESTION_CACHE_MAX_VARIANTS = int(os.getenv("QUESTION_CACHE_MAX_VARIANTS", 256))
+
+
+class RenderedQuestions:
+    """One response body, ready to send, with its strong ETag."""
+    __slots__ = ("body", "etag", "total")
+
+    def __init__(self, questions: List[dict], total: int):
+        self.body = json.dumps(questions, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.etag = '"' + hashlib.sha256(self.body).hexdigest()[:32] + '"'
+        self.total = total
+
+
+class QuestionSet:
+    """
+    The serialised question bank as loaded at one version. The full set is
+    rendered up front; filtered or paged variants are rendered on first use.
+    """
+
+    def __init__(self, questions: List[dict]):
+        self.questions = questions
+        self.by_category: Dict[str, List[dict]] = {}
+        for question in questions:
+            self.by_category.setdefault(question["category"], []).append(question)
+        self.full = RenderedQuestions(questions, len(questions))
+        self._variants: "OrderedDict[Tuple, RenderedQuestions]" = OrderedDict()
+
+    def render(self, category: Optional[str] = None, limit: Optional[int] = None, offset: int = 0) -> RenderedQuestions:
+        if category is None and limit is None and not offset:
+            return self.full
+
+        key = (category, limit, offset)
+        rendered = self._variants.get(key)
+        if rendered is not None:
+            self._variants.move_to_end(key)
+            return rendered
+
+        matching = self.questions if category is None else self.by_category.get(category, [])
+        page = matching[offset:offset + limit] if limit is not None else matching[offset:]
+        rendered = RenderedQuestions(page, len(matching))
+        self._variants[key] = rendered
+        while len(self._variants) > QUESTION_CACHE_MAX_VARIANTS:
+            self._variants.popitem(last=False)
+        return rendered
+
+
+async def load_questions(db: AsyncSession) -> QuestionSet:
+    result = await db.execute(select(Question).order_by(Question.id))
+    questions = QuestionSet([QuestionOut.from_orm(q).model_dump() for q in result.scalars().all()])
+    print(f"📝 Question cache loaded {len(questions.questions)} questions")
+    return questions
+
+
+question_cache = TableCache("questions", load_questions, [Question], QUESTION_CACHE_TTL)
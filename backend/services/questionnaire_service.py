@@ -0,0 +1,78 @@
+# backend/services/questionnaire_service.py
+
+import math
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.future import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Question, User, UserAnswer
+from services.talent_recommendation_service import add_to_profile, rebuild_profiles
+
+
+class InvalidSubmission(Exception):
+    pass
+
+
+async def question_categories(db: AsyncSession, question_ids: Iterable[int]) -> Dict[int, str]:
+    """Category of each existing question among `question_ids`, in one query."""
+    result = await db.execute(select(Question.id, Question.category).where(Question.id.in_(set(question_ids))))
+    return dict(result.all())
+
+
+def validate_answers(answers: List[Tuple[int, float]], categories: Dict[int, str]):
+    """Rejects the whole payload if any answer is unusable, before anything is written."""
+    unknown = sorted({question_id for question_id, _ in answers if question_id not in categories})
+    if unknown:
+        raise InvalidSubmission(f"Unknown question ids: {unknown}")
+    invalid = [question_id for question_id, answer_value in answers if not math.isfinite(answer_value)]
+    if invalid:
+        raise InvalidSubmission(f"Invalid answer values for question ids: {invalid}")
+
+
+async def submit_answers(db: AsyncSession, user_id: int, answers: List[Tuple[int, float]]):
+    """
+    Validates a questionnaire submission with one lookup, then writes every answer
+    with a single multi-row INSERT and folds them into the user's talent profile.
+    The caller commits.
+    """
+    if not answers:
+        return
+    categories = await question_categories(db, (question_id for question_id, _ in answers))
+    validate_answers(answers, categories)
+
+    await db.execute(insert(UserAnswer).values([
+        {"user_id": user_id, "question_id": question_id, "answer_value": answer_value}
+        for question_id, answer_value in answers
+    ]))
+    await add_to_profile(db, user_id, answers, categories)
+
+
+async def copy_answers(db: AsyncSession, rows: List[Tuple[int, int, float]]) -> int:
+    """
+    Loads many users' (user_id, question_id, answer_value) rows with PostgreSQL COPY,
+    then rebuilds the affected users' talent profiles. For offline imports; the
+    caller commits. Returns the number of answers loaded.
+    """
+    if not rows:
+        return 0
+    user_ids = sorted({user_id for user_id, _, _ in rows})
+    result = await db.execute(select(User.id).where(User.id.in_(user_ids)))
+    unknown_users = sorted(set(user_ids) - set(result.scalars().all()))
+    if unknown_users:
+        raise InvalidSubmission(f"Unknown user ids: {unknown_users}")
+
+    categories = await question_categories(db, (question_id for _, question_id, _ in rows))
+    validate_answers([(question_id, answer_value) for _, question_id, answer_value in rows], categories)
+
+    # COPY goes through the asyncpg connection underneath the session's transaction
+    connection = await db.connection()
+    raw = await connection.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(
+        UserAnswer.__tablename__,
+        records=rows,
+        columns=["user_id", "question_id", "answer_value"]
+    )
+    await rebuild_profiles(db, user_ids)
+    return len(rows)
@@ -0,0 +1,157 @@
+# backend/services/scheme_index.py
+
+import json
+import os
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy.future import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Scheme
+from pydanticmodels.scheme_models import SchemeRequest, SchemeResponse
+from services.table_cache import TableCache
+
+SCHEME_INDEX_TTL = float(os.getenv("SCHEME_INDEX_TTL", "300"))
+
+
+class CompiledCriteria:
+    """
+    Eligibility criteria of one scheme, parsed and normalised once at load time.
+    `matches` applies exactly the same rules as the original linear filter.
+    """
+    __slots__ = ("min_age", "max_age", "max_income", "categories", "state", "disability_required", "marital_status")
+
+    def __init__(self, criteria: dict):
+        self.min_age = float(criteria["min_age"]) if criteria.get("min_age") is not None else None
+        self.max_age = float(criteria["max_age"]) if criteria.get("max_age") is not None else None
+        self.max_income = float(criteria["max_income"]) if criteria.get("max_income") is not None else None
+        self.categories = frozenset(c.lower() for c in criteria["category"]) if criteria.get("category") else None
+        self.state = criteria["state"].strip().lower() if criteria.get("state") else None
+        self.disability_required = criteria.get("disability_required")
+        self.marital_status = criteria["marital_status"].lower() if criteria.get("marital_status") else None
+
+    def matches(self, user: SchemeRequest) -> bool:
+        if self.min_age is not None and user.age < self.min_age:
+            return False
+        if self.max_age is not None and user.age > self.max_age:
+            return False
+        if self.max_income is not None and user.income > self.max_income:
+            return False
+        if self.categories is not None and user.category.lower() not in self.categories:
+            return False
+        if self.state is not None and user.state.strip().lower() != self.state:
+            return False
+        if self.disability_required is not None and self.disability_required != user.disability:
+            return False
+        if self.marital_status is not None and user.marital_status.lower() != self.marital_status:
+            return False
+        return True
+
+
+class _SortedLimit:
+    """Scheme positions keyed by one numeric limit, sorted so a lookup is a bisect."""
+
+    def __init__(self):
+        self.unbounded: Set[int] = set()
+        self._pairs = []
+        self._limits: List[float] = []
+        self._positions: List[int] = []
+
+    def add(self, limit: Optional[float], pos: int):
+        if limit is None:
+            self.unbounded.add(pos)
+        else:
+            self._pairs.append((limit, pos))
+
+    def freeze(self):
+        self._pairs.sort()
+        self._limits = [limit for limit, _ in self._pairs]
+        self._positions = [pos for _, pos in self._pairs]
+        self._pairs = []
+
+    def at_most(self, value: float) -> Set[int]:
+        """Positions whose limit is <= value, plus the unbounded ones."""
+        return self.unbounded.union(self._positions[:bisect_right(self._limits, value)])
+
+    def at_least(self, value: float) -> Set[int]:
+        """Positions whose limit is >= value, plus the unbounded ones."""
+        return self.unbounded.union(self._positions[bisect_left(self._limits, value):])
+
+
+class SchemeIndex:
+    """
+    Immutable snapshot of the scheme catalogue.
+    Schemes are bucketed by state, category and marital status (the `None` bucket
+    holds schemes without that constraint) and age/income limits are kept sorted,
+    so a lookup only runs the compiled predicate on the surviving candidates.
+    """
+
+    def __init__(self, schemes: List[Scheme]):
+        self.schemes: List[SchemeResponse] = []
+        self.criteria: List[CompiledCriteria] = []
+        self.by_state: Dict[Optional[str], Set[int]] = {}
+        self.by_category: Dict[Optional[str], Set[int]] = {}
+        self.by_marital_status: Dict[Optional[str], Set[int]] = {}
+        self.min_age = _SortedLimit()
+        self.max_age = _SortedLimit()
+        self.max_income = _SortedLimit()
+
+        for pos, scheme in enumerate(sorted(schemes, key=lambda s: s.id)):
+            raw = scheme.eligibility_criteria
+            compiled = CompiledCriteria(raw if isinstance(raw, dict) else json.loads(raw))
+            self.schemes.append(SchemeResponse(
+                id=scheme.id,
+                name=scheme.name,
+                description=scheme.description,
+                type=scheme.type,
+                benefits=scheme.benefits,
+                links=scheme.links
+            ))
+            self.criteria.append(compiled)
+
+            self.by_state.setdefault(compiled.state, set()).add(pos)
+            self.by_marital_status.setdefault(compiled.marital_status, set()).add(pos)
+            for category in compiled.categories or [None]:
+                self.by_category.setdefault(category, set()).add(pos)
+            self.min_age.add(compiled.min_age, pos)
+            self.max_age.add(compiled.max_age, pos)
+            self.max_income.add(compiled.max_income, pos)
+
+        for limit in (self.min_age, self.max_age, self.max_income):
+            limit.freeze()
+
+    @staticmethod
+    def _bucket(buckets: Dict[Optional[str], Set[int]], key: str) -> Set[int]:
+        return buckets.get(key, set()) | buckets.get(None, set())
+
+    def lookup(self, user: SchemeRequest) -> List[SchemeResponse]:
+        if not self.schemes:
+            return []
+
+        candidate_sets = [
+            self._bucket(self.by_state, user.state.strip().lower()),
+            self._bucket(self.by_category, user.category.lower()),
+            self._bucket(self.by_marital_status, user.marital_status.lower()),
+        ]
+        candidate_sets.sort(key=len)
+        candidates = candidate_sets[0].intersection(*candidate_sets[1:])
+
+        if candidates:
+            candidates &= self.min_age.at_most(user.age)
+        if candidates:
+            candidates &= self.max_age.at_least(user.age)
+        if candidates:
+            candidates &= self.max_income.at_least(user.income)
+
+        return [self.schemes[pos] for pos in sorted(candidates) if self.criteria[pos].matches(user)]
+
+
+async def load_scheme_index(db: AsyncSession) -> SchemeIndex:
+    result = await db.execute(select(Scheme))
+    index = SchemeIndex(result.scalars().all())
+    print(f"📚 Scheme index rebuilt with {len(index.schemes)} schemes")
+    return index
+
+
+scheme_index = TableCache("schemes", load_scheme_index, [Scheme], SCHEME_INDEX_TTL)
@@ -1,44 +1,56 @@
 # backend/services/scheme_recommendation_service.py
 
-import json
+import os
+from sqlalchemy import and_, or_
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from models import Scheme
 from pydanticmodels.scheme_models import SchemeRequest
+from services.scheme_index import scheme_index
 
-async def match_schemes(db: AsyncSession, user: SchemeRequest):
-    result = await db.execute(select(Scheme))
-    all_schemes = result.scalars().all()
-    
-    eligible_schemes = []
-
-    for scheme in all_schemes:
-        # Assuming scheme.eligibility_criteria is already a JSON object, if not, parse it
-        criteria = scheme.eligibility_criteria if isinstance(scheme.eligibility_criteria, dict) else json.loads(scheme.eligibility_criteria)
-
-        print(f"Checking scheme: {scheme.name} | Scheme state: {criteria.get('state')} | User state: {user.state}")
-
-        # Matching criteria logic
-        if criteria.get("min_age") is not None and user.age < criteria["min_age"]:
-            continue
-        if criteria.get("max_age") is not None and user.age > criteria["max_age"]:
-            continue
-        if criteria.get("max_income") is not None and user.income > criteria["max_income"]:
-            continue
-        if criteria.get("category") and user.category.lower() not in [c.lower() for c in criteria["category"]]:
-            continue
-        
-        if criteria.get("state") and user.state.strip().lower() != criteria["state"].strip().lower():
-            continue
-
-        if criteria.get("disability_required") is not None and criteria["disability_required"] != user.disability:
-            continue
-        if criteria.get("marital_status") and user.marital_status.lower() != criteria["marital_status"].lower():
-            continue
+# "index" matches against the in-memory scheme index, "sql" lets PostgreSQL do the filtering
+SCHEME_MATCH_ENGINE = os.getenv("SCHEME_MATCH_ENGINE", "index").lower()
 
+async def match_schemes(db: AsyncSession, user: SchemeRequest):
+    if SCHEME_MATCH_ENGINE == "sql":
+        eligible_schemes = await match_schemes_sql(db, user)
+    else:
+        # The index is built once from the `schemes` table and rebuilt after writes to it,
+        # so a lookup only evaluates the schemes whose buckets and age/income ranges fit the user.
+        index = await scheme_index.get(db)
+        eligible_schemes = index.lookup(user)
 
-        eligible_schemes.append(scheme)
-    
     print(f"[DEBUG] Eligible schemes: {[s.name for s in eligible_schemes]}")
 
     return eligible_schemes
+
+def eligibility_filter(user: SchemeRequest):
+    """
+    Same rules as CompiledCriteria.matches, expressed over the generated columns
+    on `schemes` so they can use the btree and GIN indexes.
+    """
+    return and_(
+        or_(Scheme.min_age.is_(None), Scheme.min_age <= user.age),
+        or_(Scheme.max_age.is_(None), Scheme.max_age >= user.age),
+        or_(Scheme.max_income.is_(None), Scheme.max_income >= user.income),
+        or_(Scheme.categories_norm.is_(None), Scheme.categories_norm.contains([user.category.lower()])),
+        or_(Scheme.state_norm.is_(None), Scheme.state_norm == user.state.strip().lower()),
+        or_(Scheme.disability_required.is_(None), Scheme.disability_required == user.disability),
+        or_(Scheme.marital_status_norm.is_(None), Scheme.marital_status_norm == user.marital_status.lower()),
+    )
+
+async def match_schemes_sql(db: AsyncSession, user: SchemeRequest):
+    # Only the eligible rows, and only the columns the response needs, leave the database
+    result = await db.execute(
+        select(
+            Scheme.id,
+            Scheme.name,
+            Scheme.description,
+            Scheme.type,
+            Scheme.benefits,
+            Scheme.links
+        )
+        .where(eligibility_filter(user))
+        .order_by(Scheme.id)
+    )
+    return result.all()
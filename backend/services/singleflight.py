@@ -0,0 +1,105 @@
+# backend/services/singleflight.py
+
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable, Dict, Generic, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class SharedStream(Generic[T]):
+    """
+    Replays one upstream stream (audio bytes, answer tokens) to any number of listeners. The upstream is
+    pumped by its own task, so it runs to completion even if every listener leaves;
+    listeners that join late first receive the chunks they missed.
+    """
+
+    def __init__(self, source: AsyncIterator[T]):
+        self.source = source
+        self.chunks: List[T] = []
+        self.finished = False
+        self.error: Optional[BaseException] = None
+        self._changed = asyncio.Condition()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> asyncio.Task:
+        self._task = asyncio.create_task(self._pump())
+        return self._task
+
+    async def _pump(self):
+        try:
+            async for chunk in self.source:
+                async with self._changed:
+                    self.chunks.append(chunk)
+                    self._changed.notify_all()
+        except Exception as e:
+            self.error = e
+        finally:
+            async with self._changed:
+                self.finished = True
+                self._changed.notify_all()
+
+    async def ready(self):
+        """Waits for the first chunk. Raises if the upstream failed before producing one."""
+        async with self._changed:
+            await self._changed.wait_for(lambda: self.chunks or self.finished)
+        if not self.chunks:
+            raise self.error or Exception("Upstream stream was empty")
+
+    async def listen(self) -> AsyncIterator[T]:
+        sent = 0
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: sent < len(self.chunks) or self.finished)
+                new_chunks = self.chunks[sent:]
+                finished = self.finished
+            for chunk in new_chunks:
+                yield chunk
+            sent += len(new_chunks)
+            if finished and sent == len(self.chunks):
+                if self.error is not None:
+                    raise self.error
+                return
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent work on the same key: the first caller starts it, everyone
+    arriving while it is in flight awaits the same result. Nothing is remembered
+    once the flight lands; caching is left to the caller.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._flights: Dict[str, object] = {}
+        self.stats = {"started": 0, "joined": 0}
+
+    def _land(self, key: str, flight: object):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._flights.get(key)
+        if task is None:
+            task = asyncio.create_task(fn())
+            self._flights[key] = task
+            task.add_done_callback(lambda done: self._land(key, done))
+            self.stats["started"] += 1
+        else:
+            self.stats["joined"] += 1
+        # A waiter that is cancelled (e.g. its client disconnected) must not cancel the others
+        return await asyncio.shield(task)
+
+    def share(self, key: str, factory: Callable[[], AsyncIterator[T]]) -> SharedStream[T]:
+        """Like do(), for a stream that every caller consumes as it arrives."""
+        shared = self._flights.get(key)
+        if shared is None:
+            shared = SharedStream(factory())
+            self._flights[key] = shared
+            shared.start().add_done_callback(lambda _: self._land(key, shared))
+            self.stats["started"] += 1
+        else:
+            self.stats["joined"] += 1
+        return shared
+
+    def snapshot(self) -> dict:
+        return {**self.stats, "in_flight": len(self._flights)}
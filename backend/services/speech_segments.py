@@ -0,0 +1,43 @@
+# backend/services/speech_segments.py
+
+import os
+import re
+from typing import List
+
+# Segments shorter than this are merged into the next one, so we do not
+# synthesise a clip per word for answers like "Certainly. Yes."
+SPEECH_SEGMENT_MIN_CHARS = int(os.getenv("SPEECH_SEGMENT_MIN_CHARS", 40))
+
+# A segment ends at a line break (numbered points are one per line) or at
+# sentence punctuation followed by whitespace and the start of a new sentence.
+# The "1." of a numbered point is not a sentence end.
+_BOUNDARY = re.compile(r"\n+|(?<!\d)[.!?]+(?=\s+[\"'(\[]?[A-Z0-9])")
+
+
+class SpeechSegmenter:
+    """
+    Cuts streaming LLM output into speakable segments. Text is fed in as it
+    arrives and a segment is returned once its end is certain; flush() returns
+    whatever is left when the stream ends.
+    """
+
+    def __init__(self, min_chars: int = SPEECH_SEGMENT_MIN_CHARS):
+        self.min_chars = min_chars
+        self.buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        self.buffer += text
+        segments = []
+        start = 0
+        for match in _BOUNDARY.finditer(self.buffer):
+            segment = self.buffer[start:match.end()].strip()
+            if len(segment) >= self.min_chars:
+                segments.append(segment)
+                start = match.end()
+        self.buffer = self.buffer[start:]
+        return segments
+
+    def flush(self) -> List[str]:
+        segment = self.buffer.strip()
+        self.buffer = ""
+        return [segment] if segment else []
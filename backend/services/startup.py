@@ -0,0 +1,79 @@
+# backend/services/startup.py
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional
+
+# Failed warm-up steps are retried with exponential backoff, capped at this many seconds
+STARTUP_RETRY_MAX_DELAY = float(os.getenv("STARTUP_RETRY_MAX_DELAY", "30"))
+
+
+class StartupState:
+    """
+    Times each startup step and tracks readiness. Warm-up steps run in the
+    background after the server starts accepting connections; the worker only
+    reports ready once all of them have succeeded.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.timings: "OrderedDict[str, float]" = OrderedDict()
+        self.errors: Dict[str, str] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, name: str, seconds: float):
+        self.timings[name] = round(seconds, 4)
+
+    async def step(self, name: str, work: Awaitable) -> bool:
+        """
+        Runs one step and records how long it took. A failing step is logged and
+        kept in `errors` until it succeeds, not raised. Returns whether it succeeded.
+        """
+        started = time.perf_counter()
+        try:
+            await work
+        except Exception as e:
+            self.errors[name] = str(e)
+            print(f"⚠️ Startup step '{name}' failed:", e)
+            return False
+        else:
+            self.errors.pop(name, None)
+            return True
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def start_warm_up(self, steps: Dict[str, Callable[[], Awaitable]]):
+        self._task = asyncio.create_task(self._warm_up(steps))
+
+    async def _retrying(self, name: str, factory: Callable[[], Awaitable]):
+        delay = 1.0
+        while not await self.step(name, factory()):
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, STARTUP_RETRY_MAX_DELAY)
+
+    async def _warm_up(self, steps: Dict[str, Callable[[], Awaitable]]):
+        started = time.perf_counter()
+        await asyncio.gather(*(self._retrying(name, factory) for name, factory in steps.items()))
+        self.record("warm_up_total", time.perf_counter() - started)
+        # A step run before warm-up (e.g. http_clients) that failed is not retried here
+        if self.errors:
+            print("❌ Not ready, startup steps failed: " + ", ".join(self.errors))
+            return
+        self.ready = True
+        print("🚀 Ready. Startup timings (s): " + ", ".join(f"{name}={seconds}" for name, seconds in self.timings.items()))
+
+    def snapshot(self) -> dict:
+        return {"ready": self.ready, "timings": dict(self.timings), "errors": self.errors}
+
+    async def close(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+
+startup_state = StartupState()
@@ -0,0 +1,35 @@
+# backend/services/stt_worker.py
+
+# Runs inside the local speech-to-text process pool. Kept free of app imports
+# so spawned workers start quickly; the model is loaded once per process.
+
+import os
+from typing import List, Tuple
+
+_model = None
+
+
+def init_worker(model_name: str, compute_type: str, cpu_threads: int):
+    global _model
+    try:
+        from faster_whisper import WhisperModel
+    except ImportError:
+        raise RuntimeError("STT_BACKEND=local needs the 'faster-whisper' package. Install it with pip install faster-whisper.")
+    _model = WhisperModel(model_name, device="cpu", compute_type=compute_type, cpu_threads=cpu_threads)
+
+
+def ping() -> int:
+    """Used at startup to make every worker spawn and load its model."""
+    return os.getpid()
+
+
+def transcribe_batch(paths: List[str]) -> List[Tuple[bool, str]]:
+    """Transcribes each file with the warm model. Returns (ok, text or error) per path."""
+    results = []
+    for path in paths:
+        try:
+            segments, _ = _model.transcribe(path, beam_size=1)
+            results.append((True, " ".join(segment.text.strip() for segment in segments).strip()))
+        except Exception as e:
+            results.append((False, str(e)))
+    return results
@@ -0,0 +1,113 @@
+# backend/services/table_cache.py
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Generic, Optional, Sequence, Set, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+
+from database import AsyncSessionLocal
+
+T = TypeVar("T")
+
+
+class WriteTracker:
+    """
+    Notes the ids of the `models` rows a session writes, then hands them to
+    `on_commit` only once that transaction has committed; a rollback forgets them.
+    Bulk statements don't say which rows they touched, so they report None.
+    """
+
+    def __init__(self, name: str, models: Sequence[type], on_commit: Callable[[Optional[Set]], None],
+                 operations: Sequence[str] = ("insert", "update", "delete")):
+        self.key = f"{name}_dirty"
+        self.models = tuple(models)
+        self.on_commit = on_commit
+        self.operations = tuple(operations)
+
+        for model in self.models:
+            for operation in self.operations:
+                event.listen(model, f"after_{operation}", self._on_row_write)
+        event.listen(Session, "do_orm_execute", self._on_bulk_write)
+        event.listen(Session, "after_commit", self._on_commit)
+        event.listen(Session, "after_rollback", self._on_rollback)
+
+    def _on_row_write(self, mapper, connection, target):
+        session = object_session(target)
+        if session is None:
+            return
+        ids = session.info.setdefault(self.key, set())
+        # None: a bulk write already marked every row
+        if ids is not None:
+            ids.add(target.id)
+
+    def _on_bulk_write(self, orm_execute_state):
+        if not any(getattr(orm_execute_state, f"is_{operation}") for operation in self.operations):
+            return
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None and mapper.class_ in self.models:
+            orm_execute_state.session.info[self.key] = None
+
+    def _on_commit(self, session):
+        if self.key in session.info:
+            self.on_commit(session.info.pop(self.key))
+
+    def _on_rollback(self, session):
+        session.info.pop(self.key, None)
+
+
+class TableCache(Generic[T]):
+    """
+    A value built from the database by `loader`, loaded lazily and rebuilt once a
+    write to any of `models` commits on this worker. Other workers only see our
+    writes after `ttl` seconds (0 = never expire).
+    """
+
+    def __init__(self, name: str, loader: Callable[[AsyncSession], Awaitable[T]], models: Sequence[type], ttl: float):
+        self.name = name
+        self.loader = loader
+        self.ttl = ttl
+        self._value: Optional[T] = None
+        self._loaded_at = 0.0
+        self._generation = 0
+        # Set by a write on this worker; the next load reads the primary, as a lagging replica
+        # could hand back the old rows and they would be treated as fresh for the whole TTL
+        self._invalidated = False
+        self._lock = asyncio.Lock()
+        self.tracker = WriteTracker(name, models, lambda _: self.invalidate())
+
+    def invalidate(self):
+        self._generation += 1
+        self._invalidated = True
+
+    def _is_fresh(self, generation: int) -> bool:
+        if self._value is None or generation != self._generation:
+            return False
+        return not self.ttl or time.monotonic() - self._loaded_at < self.ttl
+
+    async def get(self, db: AsyncSession) -> T:
+        generation = self._generation
+        if self._is_fresh(generation):
+            return self._value
+
+        async with self._lock:
+            generation = self._generation
+            if self._is_fresh(generation):
+                return self._value
+
+            if self._invalidated:
+                async with AsyncSessionLocal() as primary:
+                    value = await self.loader(primary)
+            else:
+                value = await self.loader(db)
+
+            self._value = value
+            self._loaded_at = time.monotonic()
+            # A write committed while we were loading leaves the cache stale
+            if generation != self._generation:
+                self._loaded_at = 0.0
+            else:
+                self._invalidated = False
+            return value
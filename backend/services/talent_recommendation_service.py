@@ -0,0 +1,198 @@
+# backend/services/talent_recommendation_service.py
+
+import hashlib
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import delete, func, insert, or_, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.future import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Question, UserAnswer, UserCareerRecommendation, UserRecommendationState, UserTalentProfile
+from services.career_matcher import CareerMatcher, career_matcher
+
+# Upper bound on user ids per batch request
+TALENT_BATCH_MAX_USERS = int(os.getenv("TALENT_BATCH_MAX_USERS", 1000))
+
+
+async def build_profiles(db: AsyncSession, user_ids: Iterable[int]) -> Dict[int, Dict[str, float]]:
+    """
+    Talent profile (average answer per question category) for each user, read
+    from the running totals in `talent_profiles`. Users without answers are left out.
+    """
+    result = await db.execute(
+        select(UserTalentProfile.user_id, UserTalentProfile.category, UserTalentProfile.total, UserTalentProfile.count)
+        .where(UserTalentProfile.user_id.in_(list(user_ids)), UserTalentProfile.count > 0)
+    )
+
+    profiles: Dict[int, Dict[str, float]] = {}
+    for user_id, category, total, count in result.all():
+        profiles.setdefault(user_id, {})[category] = total / count
+    return profiles
+
+
+async def add_to_profile(db: AsyncSession, user_id: int, answers: List[Tuple[int, float]], categories: Dict[int, str]):
+    """
+    Folds newly submitted (question_id, answer_value) pairs into the user's running
+    totals, given each question's category. Runs in the caller's transaction, so
+    the profile commits with the answers.
+    """
+    totals: Dict[str, List[float]] = {}
+    for question_id, answer_value in answers:
+        category = categories.get(question_id)
+        if category is None:
+            continue
+        total = totals.setdefault(category, [0.0, 0])
+        total[0] += answer_value
+        total[1] += 1
+    if not totals:
+        return
+
+    stmt = pg_insert(UserTalentProfile).values([
+        {"user_id": user_id, "category": category, "total": total, "count": count}
+        for category, (total, count) in totals.items()
+    ])
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[UserTalentProfile.user_id, UserTalentProfile.category],
+        set_={
+            "total": UserTalentProfile.total + stmt.excluded.total,
+            "count": UserTalentProfile.count + stmt.excluded.count
+        }
+    ))
+
+
+async def rebuild_profiles(db: AsyncSession, user_ids: Optional[List[int]] = None) -> int:
+    """
+    Recomputes `talent_profiles` from `user_answers` for the given users (all users
+    by default), e.g. to backfill existing data or after a question changed category.
+    Returns the number of profile rows written. The caller commits.
+    """
+    delete_stmt = delete(UserTalentProfile)
+    aggregate = (
+        select(
+            UserAnswer.user_id,
+            Question.category,
+            func.sum(UserAnswer.answer_value),
+            func.count(UserAnswer.id)
+        )
+        .join(Question, Question.id == UserAnswer.question_id)
+        .group_by(UserAnswer.user_id, Question.category)
+    )
+    if user_ids is not None:
+        delete_stmt = delete_stmt.where(UserTalentProfile.user_id.in_(user_ids))
+        aggregate = aggregate.where(UserAnswer.user_id.in_(user_ids))
+
+    await db.execute(delete_stmt)
+    result = await db.execute(
+        insert(UserTalentProfile).from_select(["user_id", "category", "total", "count"], aggregate)
+    )
+    return result.rowcount
+
+
+def profile_hash(profile: Dict[str, float], matcher: CareerMatcher) -> str:
+    """Identifies the inputs a stored score came from: the profile and the career set it was scored against."""
+    material = json.dumps({"profile": profile, "careers": matcher.fingerprint}, sort_keys=True)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+async def load_stored(db: AsyncSession, user_ids: List[int]) -> Tuple[Dict[int, str], Dict[int, Dict[int, float]]]:
+    """
+    The hash each user was last scored at, and their stored score per career.
+    Users with no positive match have a hash but no scores.
+    """
+    result = await db.execute(
+        select(UserRecommendationState.user_id, UserRecommendationState.profile_hash)
+        .where(UserRecommendationState.user_id.in_(user_ids))
+    )
+    scored_at = dict(result.all())
+
+    result = await db.execute(
+        select(UserCareerRecommendation.user_id, UserCareerRecommendation.career_id, UserCareerRecommendation.score)
+        .where(UserCareerRecommendation.user_id.in_(list(scored_at)))
+    )
+    stored: Dict[int, Dict[int, float]] = {}
+    for user_id, career_id, score in result.all():
+        stored.setdefault(user_id, {})[career_id] = score
+    return scored_at, stored
+
+
+async def save_recommendations(db: AsyncSession, user_ids: List[int], hashes: List[str], scores: np.ndarray, matcher: CareerMatcher):
+    """
+    Replaces the stored recommendations of the given users: one upsert for every
+    positive match, one delete for rows left over from an older profile, and one
+    upsert recording the hash each user was scored at.
+    """
+    rows, columns = np.nonzero(scores > 0)
+    if len(rows):
+        stmt = pg_insert(UserCareerRecommendation).values([
+            {
+                "user_id": user_ids[row],
+                "career_id": int(matcher.career_ids[column]),
+                "score": float(scores[row, column]),
+                "profile_hash": hashes[row]
+            }
+            for row, column in zip(rows.tolist(), columns.tolist())
+        ])
+        await db.execute(stmt.on_conflict_do_update(
+            constraint="uq_user_career_recommendations_user_career",
+            set_={"score": stmt.excluded.score, "profile_hash": stmt.excluded.profile_hash}
+        ))
+    # Rows stored before profile hashes existed have a NULL hash, which NOT IN never matches
+    await db.execute(
+        delete(UserCareerRecommendation).where(
+            UserCareerRecommendation.user_id.in_(user_ids),
+            or_(
+                UserCareerRecommendation.profile_hash.is_(None),
+                tuple_(UserCareerRecommendation.user_id, UserCareerRecommendation.profile_hash).not_in(list(zip(user_ids, hashes)))
+            )
+        )
+    )
+
+    stmt = pg_insert(UserRecommendationState).values([
+        {"user_id": user_id, "profile_hash": user_hash} for user_id, user_hash in zip(user_ids, hashes)
+    ])
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[UserRecommendationState.user_id],
+        set_={"profile_hash": stmt.excluded.profile_hash}
+    ))
+
+
+async def recommend_careers(db: AsyncSession, user_ids: List[int], top_k: int = 5) -> Dict[int, List[dict]]:
+    """
+    Returns the top_k careers per user. Users whose profile and the career set are
+    unchanged since they were last scored are served from the stored rows (none, if
+    nothing matched) without a write; everyone else is scored in one matrix product
+    and their rows are upserted on (user_id, career_id). Users without answers are missing from the result.
+    """
+    profiles = await build_profiles(db, user_ids)
+    if not profiles:
+        return {}
+
+    matcher = await career_matcher.get(db)
+    profiled_ids = [user_id for user_id in user_ids if user_id in profiles]
+    hashes = {user_id: profile_hash(profiles[user_id], matcher) for user_id in profiled_ids}
+    scored_at, stored = await load_stored(db, profiled_ids)
+
+    results: Dict[int, List[dict]] = {}
+    stale_ids = []
+    for user_id in profiled_ids:
+        if scored_at.get(user_id) != hashes[user_id]:
+            stale_ids.append(user_id)
+            continue
+        # Only positive matches are stored; every other career scores 0
+        stored_scores = stored.get(user_id, {})
+        scores = np.array([stored_scores.get(int(career_id), 0.0) for career_id in matcher.career_ids])
+        results[user_id] = [matcher.recommendation(index, scores[index]) for index in matcher.top_k(scores, top_k)]
+
+    if stale_ids:
+        stale_hashes = [hashes[user_id] for user_id in stale_ids]
+        scores = matcher.score_many([profiles[user_id] for user_id in stale_ids])
+        await save_recommendations(db, stale_ids, stale_hashes, scores, matcher)
+        await db.commit()
+        for row, user_id in enumerate(stale_ids):
+            results[user_id] = [matcher.recommendation(index, scores[row, index]) for index in matcher.top_k(scores[row], top_k)]
+
+    return {user_id: results[user_id] for user_id in profiled_ids}
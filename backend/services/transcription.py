@@ -0,0 +1,533 @@
+# backend/services/transcription.py
+
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import AsyncIterator, List, Optional, Tuple, Union
+
+from fastapi import UploadFile
+
+from services.http_clients import get_client
+from services import stt_worker
+
+ASSEMBLY_API_KEY = os.getenv("ASSEMBLY_API_KEY")
+
+# Give up on a transcript after this many seconds
+TRANSCRIPTION_DEADLINE = float(os.getenv("TRANSCRIPTION_DEADLINE", 120))
+TRANSCRIPTION_POLL_INITIAL = float(os.getenv("TRANSCRIPTION_POLL_INITIAL", 0.5))
+TRANSCRIPTION_POLL_MAX = float(os.getenv("TRANSCRIPTION_POLL_MAX", 5))
+# Public URL of POST /api/transcriptions/webhook. When set, AssemblyAI calls us on
+# completion and polling only runs as a slow safety net.
+TRANSCRIPTION_WEBHOOK_URL = os.getenv("TRANSCRIPTION_WEBHOOK_URL")
+TRANSCRIPTION_WEBHOOK_SECRET = os.getenv("TRANSCRIPTION_WEBHOOK_SECRET")
+WEBHOOK_SECRET_HEADER = "X-Webhook-Secret"
+# Finished jobs are kept this long so clients can still fetch the result
+TRANSCRIPTION_RETENTION = float(os.getenv("TRANSCRIPTION_RETENTION", 600))
+TRANSCRIPTION_MAX_JOBS = int(os.getenv("TRANSCRIPTION_MAX_JOBS", 1000))
+# Uploads are forwarded in chunks of this size, so memory per request stays bounded
+UPLOAD_CHUNK_SIZE = int(os.getenv("TRANSCRIPTION_UPLOAD_CHUNK_SIZE", 64 * 1024))
+TRANSCRIPTION_MAX_UPLOAD_BYTES = int(os.getenv("TRANSCRIPTION_MAX_UPLOAD_BYTES", 50 * 1024 * 1024))
+
+# Which engine transcribes: "assemblyai" or "local"; STT_FALLBACK is tried if the primary can't accept the job
+STT_BACKEND = os.getenv("STT_BACKEND", "assemblyai").lower()
+STT_FALLBACK = os.getenv("STT_FALLBACK", "").lower()
+# Local engine (faster-whisper on CPU)
+STT_LOCAL_MODEL = os.getenv("STT_LOCAL_MODEL", "base")
+STT_LOCAL_COMPUTE_TYPE = os.getenv("STT_LOCAL_COMPUTE_TYPE", "int8")
+STT_LOCAL_WORKERS = int(os.getenv("STT_LOCAL_WORKERS", 1))
+STT_LOCAL_CPU_THREADS = int(os.getenv("STT_LOCAL_CPU_THREADS", 2))
+STT_LOCAL_BATCH_SIZE = int(os.getenv("STT_LOCAL_BATCH_SIZE", 4))
+# How long the first request of a batch waits for company
+STT_LOCAL_BATCH_WINDOW = float(os.getenv("STT_LOCAL_BATCH_WINDOW", 0.05))
+
+
+class TranscriptionError(Exception):
+    pass
+
+
+class UploadTooLarge(TranscriptionError):
+    pass
+
+
+async def iter_upload(file: UploadFile, chunk_size: int = UPLOAD_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    # Starlette spools multipart uploads past 1 MB to a temp file it deletes at the end of the request
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+async def _limit_size(chunks: AsyncIterator[bytes], max_bytes: int) -> AsyncIterator[bytes]:
+    total = 0
+    async for chunk in chunks:
+        total += len(chunk)
+        if total > max_bytes:
+            raise UploadTooLarge(f"Audio upload exceeds {max_bytes} bytes")
+        yield chunk
+
+
+async def _as_chunks(audio: Union[bytes, AsyncIterator[bytes]]) -> AsyncIterator[bytes]:
+    if isinstance(audio, bytes):
+        yield audio
+    else:
+        async for chunk in audio:
+            yield chunk
+
+
+class SpillFile:
+    """
+    Temp file that an upload is copied into chunk by chunk, for engines that
+    need a path or to keep a copy for the fallback engine. remove() always cleans it up.
+    """
+
+    def __init__(self):
+        fd, self.path = tempfile.mkstemp(suffix=".audio")
+        self._file = os.fdopen(fd, "wb")
+
+    async def tee(self, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        async for chunk in chunks:
+            self._file.write(chunk)
+            yield chunk
+        self.close()
+
+    async def fill(self, chunks: AsyncIterator[bytes]):
+        async for _ in self.tee(chunks):
+            pass
+
+    def close(self):
+        self._file.close()
+
+    def remove(self):
+        self.close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class TranscriptionJob:
+    """One transcription request, whichever engine handles it."""
+
+    def __init__(self, job_id: str):
+        self.id = job_id
+        self.backend: Optional[str] = None
+        # The engine's own id, e.g. the AssemblyAI transcript id
+        self.provider_id: Optional[str] = None
+        self.status = "queued"
+        self.text: Optional[str] = None
+        self.error: Optional[str] = None
+        self.created_at = time.monotonic()
+        self.finished_at: Optional[float] = None
+        self.result: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._wakeup = asyncio.Event()
+        self._cleanups = []
+        self.result.add_done_callback(lambda _: self.run_cleanups())
+
+    @property
+    def done(self) -> bool:
+        return self.result.done()
+
+    def add_cleanup(self, callback):
+        self._cleanups.append(callback)
+
+    def run_cleanups(self):
+        while self._cleanups:
+            try:
+                self._cleanups.pop()()
+            except Exception as e:
+                print(f"⚠️ Transcription cleanup failed: {e}")
+
+    def complete(self, text: str):
+        if self.done:
+            return
+        self.status, self.text, self.finished_at = "completed", text, time.monotonic()
+        self.result.set_result(text)
+
+    def fail(self, error: str):
+        if self.done:
+            return
+        self.status, self.error, self.finished_at = "error", error, time.monotonic()
+        self.result.set_exception(TranscriptionError(error))
+        # Waiters may have gone away; don't log "exception was never retrieved"
+        self.result.exception()
+
+    def to_dict(self) -> dict:
+        return {"id": self.id, "backend": self.backend, "status": self.status, "text": self.text, "error": self.error}
+
+
+class TranscriptionBackend:
+    """Speech-to-text engine. start() accepts the audio and returns a job that completes later."""
+
+    name = "base"
+
+    async def start(self, job: TranscriptionJob, audio: AsyncIterator[bytes]):
+        raise NotImplementedError
+
+    async def start_from_file(self, job: TranscriptionJob, path: str):
+        async def chunks():
+            with open(path, "rb") as f:
+                while True:
+                    chunk = f.read(UPLOAD_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    yield chunk
+        await self.start(job, chunks())
+
+    async def warm_up(self):
+        pass
+
+    async def close(self):
+        pass
+
+
+class AssemblyAIBackend(TranscriptionBackend):
+    """
+    Uploads to AssemblyAI and waits for the transcript.
+    Completion is picked up by the webhook (if configured) or by an asyncio
+    poller with exponential backoff and a deadline.
+    """
+
+    name = "assemblyai"
+
+    def __init__(self):
+        self._tasks = set()
+
+    def _headers(self) -> dict:
+        return {"authorization": ASSEMBLY_API_KEY}
+
+    async def start(self, job: TranscriptionJob, audio: AsyncIterator[bytes]):
+        assemblyai = get_client("assemblyai")
+
+        upload_response = await assemblyai.post(
+            "/upload",
+            headers={**self._headers(), "content-type": "application/octet-stream"},
+            content=audio
+        )
+        upload_response.raise_for_status()
+        upload_url = upload_response.json().get("upload_url")
+        if not upload_url:
+            raise TranscriptionError("Upload URL not received")
+
+        request = {"audio_url": upload_url}
+        if TRANSCRIPTION_WEBHOOK_URL:
+            request["webhook_url"] = TRANSCRIPTION_WEBHOOK_URL
+            if TRANSCRIPTION_WEBHOOK_SECRET:
+                request["webhook_auth_header_name"] = WEBHOOK_SECRET_HEADER
+                request["webhook_auth_header_value"] = TRANSCRIPTION_WEBHOOK_SECRET
+
+        transcript_response = await assemblyai.post("/transcript", headers=self._headers(), json=request)
+        transcript_response.raise_for_status()
+
+        job.provider_id = transcript_response.json()["id"]
+        task = asyncio.create_task(self._poll(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _fetch(self, job: TranscriptionJob):
+        response = await get_client("assemblyai").get(f"/transcript/{job.provider_id}", headers=self._headers())
+        response.raise_for_status()
+        data = response.json()
+        job.status = data["status"]
+        if data["status"] == "completed":
+            job.complete(data.get("text") or "")
+        elif data["status"] == "error":
+            job.fail(f"Transcription error: {data.get('error')}")
+
+    async def _poll(self, job: TranscriptionJob):
+        deadline = job.created_at + TRANSCRIPTION_DEADLINE
+        delay = TRANSCRIPTION_POLL_INITIAL
+        if TRANSCRIPTION_WEBHOOK_URL:
+            # The webhook wakes us up; polling is just the safety net
+            delay = TRANSCRIPTION_POLL_MAX
+        try:
+            while not job.done:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    job.fail(f"Transcription timed out after {TRANSCRIPTION_DEADLINE:.0f}s")
+                    break
+                try:
+                    await asyncio.wait_for(job._wakeup.wait(), timeout=min(delay, remaining))
+                except asyncio.TimeoutError:
+                    pass
+                job._wakeup.clear()
+                try:
+                    await self._fetch(job)
+                except Exception as e:
+                    print(f"⚠️ Transcript poll failed for {job.id}: {e}")
+                delay = min(delay * 2, TRANSCRIPTION_POLL_MAX)
+        except asyncio.CancelledError:
+            job.fail("Transcription cancelled")
+            raise
+
+    async def close(self):
+        for task in list(self._tasks):
+            task.cancel()
+
+
+class LocalWhisperBackend(TranscriptionBackend):
+    """
+    Offline transcription with faster-whisper in a process pool.
+    Each worker loads the model once; requests arriving within
+    STT_LOCAL_BATCH_WINDOW are sent to a worker together.
+    """
+
+    name = "local"
+
+    def __init__(self):
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._slots = asyncio.Semaphore(STT_LOCAL_WORKERS)
+        self._tasks = set()
+
+    def _ensure_started(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=STT_LOCAL_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=stt_worker.init_worker,
+                initargs=(STT_LOCAL_MODEL, STT_LOCAL_COMPUTE_TYPE, STT_LOCAL_CPU_THREADS),
+            )
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        return self._pool
+
+    def _discard_pool(self, pool: ProcessPoolExecutor, error: BaseException):
+        # A worker died (e.g. out of memory, or faster-whisper failed to load); start fresh next time
+        print("❌ Local STT pool broke, restarting:", error)
+        if self._pool is pool:
+            self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    async def warm_up(self):
+        pool = self._ensure_started()
+        loop = asyncio.get_running_loop()
+        # One ping per worker forces every process to spawn and load the model now
+        try:
+            pids = await asyncio.gather(*(loop.run_in_executor(pool, stt_worker.ping) for _ in range(STT_LOCAL_WORKERS)))
+        except BrokenProcessPool as e:
+            self._discard_pool(pool, e)
+            raise
+        print(f"🎧 Local STT model '{STT_LOCAL_MODEL}' warm in {len(set(pids))} worker(s)")
+
+    async def start(self, job: TranscriptionJob, audio: AsyncIterator[bytes]):
+        self._ensure_started()
+        spill = SpillFile()
+        try:
+            await spill.fill(audio)
+        except BaseException:
+            spill.remove()
+            raise
+        job.add_cleanup(spill.remove)
+        self._queue.put_nowait((job, spill.path))
+
+    async def start_from_file(self, job: TranscriptionJob, path: str):
+        # The caller owns `path` and keeps it until the job is done
+        self._ensure_started()
+        self._queue.put_nowait((job, path))
+
+    async def _dispatch(self):
+        while True:
+            batch = [await self._queue.get()]
+            deadline = time.monotonic() + STT_LOCAL_BATCH_WINDOW
+            while len(batch) < STT_LOCAL_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+            await self._slots.acquire()
+            task = asyncio.create_task(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def _worker_finished(self, future: asyncio.Future):
+        # The slot is only free once the worker process is, even if we stopped waiting for it
+        self._slots.release()
+        if not future.cancelled():
+            future.exception()
+
+    async def _run_batch(self, batch: List[Tuple[TranscriptionJob, str]]):
+        # Jobs that ran out of time while queued are not sent to a worker
+        batch = [(job, path) for job, path in batch if not job.done]
+        try:
+            if not batch:
+                self._slots.release()
+                return
+            for job, _ in batch:
+                job.status = "processing"
+            pool = self._ensure_started()
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(pool, stt_worker.transcribe_batch, [path for _, path in batch])
+        except Exception as e:
+            self._slots.release()
+            if isinstance(e, BrokenProcessPool):
+                self._discard_pool(pool, e)
+            for job, _ in batch:
+                job.fail(f"Local transcription error: {e}")
+            return
+        future.add_done_callback(self._worker_finished)
+
+        deadline = min(job.created_at for job, _ in batch) + TRANSCRIPTION_DEADLINE
+        try:
+            results = await asyncio.wait_for(asyncio.shield(future), max(deadline - time.monotonic(), 0))
+        except asyncio.TimeoutError:
+            for job, _ in batch:
+                job.fail(f"Transcription timed out after {TRANSCRIPTION_DEADLINE:.0f}s")
+            return
+        except asyncio.CancelledError:
+            for job, _ in batch:
+                job.fail("Transcription cancelled")
+            raise
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool):
+                self._discard_pool(pool, e)
+            for job, _ in batch:
+                job.fail(f"Local transcription error: {e}")
+            return
+        for (job, _), (ok, value) in zip(batch, results):
+            if ok:
+                job.complete(value)
+            else:
+                job.fail(f"Local transcription error: {value}")
+
+    async def close(self):
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+        for task in list(self._tasks):
+            task.cancel()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+BACKENDS = {
+    "assemblyai": AssemblyAIBackend,
+    "local": LocalWhisperBackend,
+}
+
+
+class TranscriptionService:
+    """
+    Tracks transcription jobs across engines; callers await job.result.
+    Jobs are held in this worker's memory only, so a job id is only known to
+    the worker that created it and clients need sticky routing to use it.
+    With several workers a webhook can land on a worker that doesn't own
+    the job; it is ignored there and the owner's poller still finishes it.
+    """
+
+    def __init__(self, backend: str = STT_BACKEND, fallback: str = STT_FALLBACK):
+        self.jobs: "OrderedDict[str, TranscriptionJob]" = OrderedDict()
+        self.backend: TranscriptionBackend = BACKENDS[backend]()
+        self.fallback: Optional[TranscriptionBackend] = BACKENDS[fallback]() if fallback and fallback != backend else None
+
+    def _prune(self):
+        now = time.monotonic()
+        for job_id in list(self.jobs):
+            job = self.jobs[job_id]
+            expired = job.finished_at is not None and now - job.finished_at > TRANSCRIPTION_RETENTION
+            if expired or (len(self.jobs) > TRANSCRIPTION_MAX_JOBS and job.done):
+                del self.jobs[job_id]
+
+    async def submit(self, audio: Union[bytes, AsyncIterator[bytes]]) -> TranscriptionJob:
+        """
+        `audio` may be bytes or an async iterator of chunks; chunks are piped to
+        the engine as they arrive, with no full in-memory copy. When a fallback
+        engine is configured the chunks are also copied to a temp file, which is
+        removed once the job finishes.
+        """
+        if isinstance(audio, bytes) and len(audio) > TRANSCRIPTION_MAX_UPLOAD_BYTES:
+            raise UploadTooLarge(f"Audio upload exceeds {TRANSCRIPTION_MAX_UPLOAD_BYTES} bytes")
+        chunks = _limit_size(_as_chunks(audio), TRANSCRIPTION_MAX_UPLOAD_BYTES)
+
+        job = TranscriptionJob(str(uuid.uuid4()))
+        spill = None
+        if self.fallback is not None:
+            spill = SpillFile()
+            job.add_cleanup(spill.remove)
+            chunks = spill.tee(chunks)
+
+        try:
+            job.backend = self.backend.name
+            await self.backend.start(job, chunks)
+        except UploadTooLarge:
+            job.run_cleanups()
+            raise
+        except Exception as e:
+            if self.fallback is None:
+                raise
+            print(f"⚠️ {self.backend.name} transcription unavailable ({e}), using {self.fallback.name}")
+            try:
+                # Drain whatever the primary engine didn't read so the copy is complete
+                async for _ in chunks:
+                    pass
+                spill.close()
+                job.backend = self.fallback.name
+                await self.fallback.start_from_file(job, spill.path)
+            except BaseException:
+                job.run_cleanups()
+                raise
+        else:
+            # The primary engine has the audio; the fallback copy is no longer needed
+            if spill is not None:
+                spill.remove()
+
+        self._prune()
+        self.jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[TranscriptionJob]:
+        return self.jobs.get(job_id)
+
+    def notify(self, provider_id: str) -> bool:
+        """Called from the webhook: fetch the transcript now instead of at the next poll."""
+        for job in reversed(self.jobs.values()):
+            if job.provider_id == provider_id:
+                if job.done:
+                    return False
+                job._wakeup.set()
+                return True
+        return False
+
+    async def wait(self, job_id: str, timeout: Optional[float] = None) -> str:
+        """
+        Waits up to `timeout` seconds for the job's text. Nobody waits past the job's
+        TRANSCRIPTION_DEADLINE: a job still unfinished by then fails, even if it is
+        stuck in a queue or on a hung worker.
+        """
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise TranscriptionError(f"Unknown transcription job {job_id}")
+        remaining = max(job.created_at + TRANSCRIPTION_DEADLINE - time.monotonic(), 0)
+        try:
+            # shield: one waiter timing out must not cancel the shared result
+            return await asyncio.wait_for(asyncio.shield(job.result), remaining if timeout is None else min(timeout, remaining))
+        except asyncio.TimeoutError:
+            if timeout is not None and timeout < remaining:
+                raise
+        job.fail(f"Transcription timed out after {TRANSCRIPTION_DEADLINE:.0f}s")
+        return await job.result
+
+    async def warm_up(self):
+        for backend in (self.backend, self.fallback):
+            if backend is not None:
+                await backend.warm_up()
+
+    async def close(self):
+        for backend in (self.backend, self.fallback):
+            if backend is not None:
+                await backend.close()
+
+
+transcription_service = TranscriptionService()
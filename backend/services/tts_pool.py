@@ -0,0 +1,72 @@
+# backend/services/tts_pool.py
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from services import tts_worker
+
+TTS_POOL_WORKERS = int(os.getenv("TTS_POOL_WORKERS", 2))
+TTS_POOL_TIMEOUT = float(os.getenv("TTS_POOL_TIMEOUT", 30))
+# Preferred fallback voice, matched against the installed voice names
+TTS_FALLBACK_VOICE = os.getenv("TTS_FALLBACK_VOICE", "zira").lower()
+
+
+class TTSPool:
+    """
+    Long-lived pyttsx3 worker processes for fallback speech synthesis.
+    Jobs queue in the executor and each worker returns the WAV bytes
+    once its engine reports the utterance finished.
+    """
+
+    def __init__(self):
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _ensure_started(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=TTS_POOL_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=tts_worker.init_worker,
+                initargs=(TTS_FALLBACK_VOICE,),
+            )
+        return self._pool
+
+    async def start(self):
+        pool = self._ensure_started()
+        loop = asyncio.get_running_loop()
+        # One ping per worker makes every process start its engine now
+        try:
+            pids = await asyncio.gather(*(loop.run_in_executor(pool, tts_worker.ping) for _ in range(TTS_POOL_WORKERS)))
+            print(f"🎙️ Fallback TTS pool warm with {len(set(pids))} worker(s)")
+        except Exception as e:
+            # Only the fallback voice depends on this; keep serving without it
+            print("⚠️ Fallback TTS pool failed to start:", e)
+            await self.close()
+
+    async def synthesize(self, text: str) -> tuple[bytes, str]:
+        try:
+            print("🎙️ Using pyttsx3 TTS fallback...")
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self._ensure_started(), tts_worker.synthesize, text)
+            audio = await asyncio.wait_for(future, timeout=TTS_POOL_TIMEOUT)
+            print("✅ Fallback TTS used. Audio length:", len(audio))
+            return audio, "audio/wav"
+        except BrokenProcessPool as e:
+            # A worker died (e.g. the speech driver crashed); start fresh next time
+            print("❌ Fallback TTS pool broke, restarting:", e)
+            self._pool = None
+        except Exception as fallback_err:
+            print("❌ Fallback TTS failed:", fallback_err)
+        return b"", ""
+
+    async def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+tts_pool = TTSPool()
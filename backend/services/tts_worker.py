@@ -0,0 +1,52 @@
+# backend/services/tts_worker.py
+
+# Runs inside the fallback TTS process pool. Each process owns one pyttsx3
+# engine, created and given its voice once, and handles one job at a time,
+# so the engine is never driven concurrently.
+
+import os
+import tempfile
+
+_engine = None
+
+
+def init_worker(voice_hint: str):
+    global _engine
+    import pyttsx3
+
+    _engine = pyttsx3.init()
+    voices = _engine.getProperty('voices')
+    voice = next((v for v in voices if voice_hint in v.name.lower()), None)
+    if voice:
+        _engine.setProperty('voice', voice.id)
+
+
+def ping() -> int:
+    """Used at startup to make every worker spawn and initialise its engine."""
+    return os.getpid()
+
+
+def synthesize(text: str) -> bytes:
+    finished = []
+
+    def on_finished(name, completed):
+        finished.append(completed)
+
+    token = _engine.connect('finished-utterance', on_finished)
+    fd, path = tempfile.mkstemp(suffix=".wav")
+    os.close(fd)
+    try:
+        _engine.save_to_file(text, path)
+        # runAndWait returns once the driver has finished the utterance and fired the callback
+        _engine.runAndWait()
+        if not finished or not finished[-1]:
+            raise RuntimeError("pyttsx3 did not finish the utterance")
+
+        with open(path, "rb") as f:
+            audio = f.read()
+        if not audio:
+            raise RuntimeError("Fallback TTS file was empty")
+        return audio
+    finally:
+        _engine.disconnect(token)
+        os.unlink(path)
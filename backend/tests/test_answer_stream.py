@@ -0,0 +1,65 @@
+# backend/tests/test_answer_stream.py
+
+import asyncio
+
+import pytest
+
+from routers import chatbot
+from services.answer_cache import AnswerCache, InMemoryBackend
+from services.llm_router import LLMProvider, LLMRouter, LLMStreamBroken
+
+
+class FakeProvider(LLMProvider):
+    kind = "fake"
+
+    def __init__(self, tokens, fail_after=None):
+        super().__init__("test")
+        self.tokens = tokens
+        self.fail_after = fail_after
+
+    async def stream(self, formatted_prompt):
+        for i, token in enumerate(self.tokens):
+            if i == self.fail_after:
+                raise ConnectionError("connection reset")
+            yield token
+
+
+@pytest.fixture
+def chat(monkeypatch):
+    def use(provider):
+        monkeypatch.setattr(chatbot, "llm_router", LLMRouter([provider]))
+        monkeypatch.setattr(chatbot, "answer_cache", AnswerCache(InMemoryBackend(), chatbot.format_prompt))
+        return chatbot
+    return use
+
+
+async def collect(stream):
+    return [token async for token in stream]
+
+
+def test_router_raises_when_stream_breaks_mid_answer():
+    router = LLMRouter([FakeProvider(["Hello", " world."], fail_after=1)])
+    with pytest.raises(LLMStreamBroken):
+        asyncio.run(collect(router.stream("prompt")))
+
+
+def test_broken_stream_is_not_cached(chat):
+    chatbot = chat(FakeProvider(["Hello", " world.", " More"], fail_after=2))
+
+    async def run():
+        tokens = await collect(chatbot.shared_answer_stream("hi"))
+        return tokens, await chatbot.answer_cache.get("hi")
+
+    tokens, cached = asyncio.run(run())
+    assert "".join(tokens) == "Certainly. Hello world."
+    assert cached is None
+
+
+def test_complete_stream_is_cached(chat):
+    chatbot = chat(FakeProvider(["Hello", " world."]))
+
+    async def run():
+        await collect(chatbot.shared_answer_stream("hi"))
+        return await chatbot.answer_cache.get("hi")
+
+    assert asyncio.run(run()) == {"ai_text": "Certainly. Hello world."}
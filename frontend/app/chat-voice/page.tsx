@@ -14,29 +14,15 @@ export default function ChatPage() {
   const mediaRecorderRef = useRef<MediaRecorder | null>(null);
   const audioChunks: Blob[] = [];
 
-  const [lastAudioBase64, setLastAudioBase64] = useState('');
-  const [lastAudioMime, setLastAudioMime] = useState('');
+  const [lastAudioUrl, setLastAudioUrl] = useState('');
   const [isLoading, setIsLoading] = useState(false);
   const [isAudioPlaying, setIsAudioPlaying] = useState(false);
   const audioRef = useRef<HTMLAudioElement | null>(null);
 
-  const base64ToBlob = (base64: string, mime = 'audio/wav') => {
-    const byteCharacters = atob(base64);
-    const byteArrays = [];
-
-    for (let i = 0; i < byteCharacters.length; i++) {
-      byteArrays.push(byteCharacters.charCodeAt(i));
-    }
-
-    return new Blob([new Uint8Array(byteArrays)], { type: mime });
-  };
-
-  const playBase64Audio = (base64: string, mimeType = 'audio/wav') => {
+  const playAudioUrl = (url: string) => {
     try {
-      if (!base64 || base64.trim() === '') throw new Error('Empty audio string');
+      if (!url || url.trim() === '') throw new Error('Empty audio URL');
 
-      const blob = base64ToBlob(base64, mimeType);
-      const url = URL.createObjectURL(blob);
       const audio = new Audio(url);
       audioRef.current = audio;
 
@@ -61,15 +47,16 @@ export default function ChatPage() {
     }
   };
 
-  const tryPlayAudio = (base64: string, mimeType = 'audio/wav') => {
-    if (!base64 || base64.trim() === '') {
+  const tryPlayAudio = (audioUrl: string) => {
+    if (!audioUrl || audioUrl.trim() === '') {
       console.warn('⚠️ No audio returned from server');
       return;
     }
 
-    setLastAudioBase64(base64);
-    setLastAudioMime(mimeType);
-    playBase64Audio(base64, mimeType);
+    // The server returns a path to the cached clip instead of inline base64
+    const url = audioUrl.startsWith('http') ? audioUrl : `http://localhost:8000${audioUrl}`;
+    setLastAudioUrl(url);
+    playAudioUrl(url);
   };
 
   const sendTextMessage = async () => {
@@ -91,7 +78,7 @@ export default function ChatPage() {
       const data = await res.json();
       const aiMsg = { sender: 'sakhi', text: data.ai_text };
       setMessages((prev) => [...prev, aiMsg]);
-      tryPlayAudio(data.audio_base64, data.audio_mime);
+      tryPlayAudio(data.audio_url);
     } catch (err) {
       console.error('❌ Error sending message:', err);
     }
@@ -125,7 +112,7 @@ export default function ChatPage() {
           const data = await res.json();
           setMessages((prev) => [...prev, { sender: 'user', text: data.user_text }]);
           setMessages((prev) => [...prev, { sender: 'sakhi', text: data.ai_text }]);
-          tryPlayAudio(data.audio_base64, data.audio_mime);
+          tryPlayAudio(data.audio_url);
         } catch (err) {
           console.error('❌ Voice input error:', err);
         }
@@ -243,9 +230,9 @@ export default function ChatPage() {
               </button>
             )}
 
-            {lastAudioBase64 && !isAudioPlaying && (
+            {lastAudioUrl && !isAudioPlaying && (
               <button
-                onClick={() => tryPlayAudio(lastAudioBase64, lastAudioMime)}
+                onClick={() => tryPlayAudio(lastAudioUrl)}
                 className="px-4 py-2 bg-gray-500 hover:bg-gray-600 text-white rounded-2xl shadow-md"
               >
                 🔁 Replay